@@ -1,15 +1,114 @@
 import sys
 import os
+import gc
+import re
+import csv
 import json
+import shutil
+import hashlib
+import tempfile
 import pandas as pd
 from pathlib import Path
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
-def extract_with_camelot(pdf_path):
+# Camelot keeps every rendered page image alive for the whole read_pdf call,
+# so long PDFs are read in page chunks to bound peak memory
+CAMELOT_CHUNK_PAGES = int(os.environ.get("CAMELOT_CHUNK_PAGES", 50))
+
+# Finished extractions are kept under CACHE_DIR/<fingerprint>/ so re-running
+# on an identical PDF just copies the previous outputs into place
+CACHE_DIR = Path(os.environ.get("PDF_EXTRACT_CACHE_DIR", ".cache"))
+
+# JVM options for Tabula. With jpype installed the JVM is started in-process
+# on the first read_pdf call and reused afterwards, so these only take effect
+# once per process.
+TABULA_JAVA_OPTIONS = os.environ.get("TABULA_JAVA_OPTIONS", "-Xmx2g").split()
+
+def _pdf_fingerprint(pdf_path):
+    """Return a BLAKE2b digest of the PDF bytes"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _restore_from_cache(cache_dir, base_name):
+    """Copy cached outputs to their expected paths; return False on a cache miss"""
+    if not any(cache_dir.glob("*summary.json")):
+        return False
+    for cached_file in cache_dir.iterdir():
+        output_file = f"{base_name}{cached_file.name}"
+        shutil.copyfile(cached_file, output_file)
+        print(f"Restored {output_file}")
+    return True
+
+def _store_in_cache(cache_dir, base_name, output_files):
+    """Copy the outputs into the cache, renaming the directory into place atomically"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f"{cache_dir.name}.", dir=CACHE_DIR))
+    for output_file in output_files:
+        shutil.copyfile(output_file, tmp_dir / output_file[len(base_name):])
+    try:
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        # Another run cached the same PDF first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# Text-showing operators in a decoded content stream: Tj, TJ, and the
+# ' and " operators that follow a string operand
+_TEXT_OPERATOR_RE = re.compile(rb"\bT[jJ]\b|\)\s*['\"]")
+
+def _page_count(pdf_path):
+    """Return the number of pages in the PDF"""
+    from PyPDF2 import PdfReader
+    return len(PdfReader(pdf_path).pages)
+
+def _has_form_xobject(page):
+    """Return True if the page draws a Form XObject, which may hold its own text"""
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources else None
+    if not xobjects:
+        return False
+    return any(xobject.get_object().get("/Subtype") == "/Form"
+               for xobject in xobjects.get_object().values())
+
+def _pages_with_text(pdf_path):
+    """Return the 1-based numbers of pages that show text, or None if the scan fails"""
+    try:
+        from PyPDF2 import PdfReader
+        pages = []
+        for page_num, page in enumerate(PdfReader(pdf_path).pages, 1):
+            contents = page.get_contents()
+            if (contents is not None and _TEXT_OPERATOR_RE.search(contents.get_data())) \
+                    or _has_form_xobject(page):
+                pages.append(page_num)
+        return pages
+    except Exception as e:
+        print(f"Page scan error: {e}")
+        return None
+
+def _read_camelot_chunked(camelot, pdf_path, pages, **kwargs):
+    """Run camelot.read_pdf chunk by chunk, keeping only each table's DataFrame"""
+    dfs = []
+    for start in range(0, len(pages), CAMELOT_CHUNK_PAGES):
+        chunk = pages[start:start + CAMELOT_CHUNK_PAGES]
+        tables = camelot.read_pdf(pdf_path, pages=",".join(map(str, chunk)), **kwargs)
+        dfs.extend(table.df for table in tables)
+        # Release the Table objects (and their page images) before the next chunk
+        del tables
+        gc.collect()
+    return dfs
+
+def extract_with_camelot(pdf_path, pages=None):
     """Extract tables using Camelot (best for bordered tables)"""
     try:
         import camelot
         print("Trying Camelot...")
-        tables = camelot.read_pdf(pdf_path, pages="all")
+        if pages is None:
+            pages = list(range(1, _page_count(pdf_path) + 1))
+        tables = _read_camelot_chunked(camelot, pdf_path, pages)
         if tables:
             print(f"Camelot found {len(tables)} tables")
             return tables
@@ -23,12 +122,19 @@ def extract_with_camelot(pdf_path):
         print(f"Camelot error: {e}")
         return []
 
-def extract_with_tabula(pdf_path):
+def extract_with_tabula(pdf_path, pages=None):
     """Extract tables using Tabula (robust for many layouts)"""
     try:
         import tabula
         print("Trying Tabula...")
-        tables = tabula.read_pdf(pdf_path, pages="all", multiple_tables=True)
+        tables = []
+        if pages != []:
+            # force_subprocess=False keeps Tabula on the in-process jpype JVM
+            # instead of paying for a fresh `java -jar` launch on every call
+            tables = tabula.read_pdf(pdf_path, pages="all" if pages is None else pages,
+                                     multiple_tables=True,
+                                     java_options=TABULA_JAVA_OPTIONS,
+                                     force_subprocess=False, silent=True)
         if tables:
             print(f"Tabula found {len(tables)} tables")
             return tables
@@ -42,63 +148,114 @@ def extract_with_tabula(pdf_path):
         print(f"Tabula error: {e}")
         return []
 
-def extract_with_pdfplumber(pdf_path):
-    """Extract tables using pdfplumber (fallback option)"""
+def _extract_page(page):
+    """Extract tables and text from a single pdfplumber page"""
+    tables = []
+    # page.objects parses the page once and caches the result, so the
+    # table finder and extract_text below share that single parse. The
+    # default table strategy builds cells from ruling lines, so pages
+    # without line/rect/curve objects cannot contain a table.
+    objects = page.objects
+    has_rulings = any(objects.get(kind) for kind in ('line', 'rect', 'curve'))
+    page_tables = page.extract_tables() if has_rulings else []
+    for table_num, table in enumerate(page_tables):
+        if table:
+            # Keep the raw rows; save_results streams them straight to CSV
+            tables.append({'page': page.page_number, 'table_num': table_num + 1, 'rows': table})
+    text = page.extract_text()
+    return tables, text
+
+def _extract_pages(pdf_path, page_nums):
+    """Extract tables and text from a batch of pages (runs in a worker process)"""
+    import pdfplumber
+    results = []
+    # Each worker re-opens the PDF (pdfminer page objects are not picklable),
+    # but only once per batch: the open PDF's resource manager caches parsed
+    # fonts, so the pages of a batch share them
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in page_nums:
+            page = pdf.pages[page_num]
+            results.append(_extract_page(page))
+            page.close()  # Drop the parsed objects before the next page
+    return results
+
+def _page_batches(page_nums, max_workers):
+    """Split page numbers into contiguous batches, a few per worker to balance load"""
+    page_nums = list(page_nums)
+    size = max(1, -(-len(page_nums) // (max_workers * 4)))
+    return [page_nums[i:i + size] for i in range(0, len(page_nums), size)]
+
+def extract_with_pdfplumber(pdf_path, pages=None):
+    """Extract tables and text using pdfplumber in a single pass (fallback option)"""
     try:
         import pdfplumber
         print("Trying pdfplumber...")
+        if pages is None:
+            with pdfplumber.open(pdf_path) as pdf:
+                page_nums = range(len(pdf.pages))
+        else:
+            page_nums = [page - 1 for page in pages]
         tables = []
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                page_tables = page.extract_tables()
-                for table_num, table in enumerate(page_tables):
-                    if table:
-                        df = pd.DataFrame(table[1:], columns=table[0])
-                        df['Page'] = page_num + 1
-                        df['Table'] = table_num + 1
-                        tables.append(df)
+        all_text = []
+        max_workers = max(1, min(os.cpu_count() or 1, len(page_nums)))
+        # spawn: the pool is started from a worker thread (see main)
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            # map() yields batches, and each batch its pages, in page order
+            batches = _page_batches(page_nums, max_workers)
+            for batch in executor.map(partial(_extract_pages, pdf_path), batches):
+                for page_tables, page_text in batch:
+                    tables.extend(page_tables)
+                    if page_text:
+                        all_text.append(page_text)
+        text = "\n".join(all_text)
         if tables:
             print(f"pdfplumber found {len(tables)} tables")
-            return tables
         else:
             print("pdfplumber found no tables")
-            return []
+        return tables, text
     except ImportError:
         print("pdfplumber not installed. Install with: pip install pdfplumber")
-        return []
+        return [], ""
     except Exception as e:
         print(f"pdfplumber error: {e}")
-        return []
+        return [], ""
 
-def extract_text_with_pdfplumber(pdf_path):
-    """Extract text using pdfplumber"""
+def _text_is_usable(text):
+    """Reject empty or mostly undecodable text"""
+    return len(text.strip()) >= 50 and text.count("\ufffd") <= len(text) * 0.05
+
+def extract_text_with_pypdf2(pdf_path):
+    """Extract text using PyPDF2 (no pdfminer layout analysis)"""
     try:
-        import pdfplumber
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text.strip()
+        from PyPDF2 import PdfReader
+        reader = PdfReader(pdf_path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages).strip()
     except Exception as e:
         print(f"Text extraction error: {e}")
         return ""
 
 def save_results(pdf_path, tables, text, method):
-    """Save extracted tables and text to files"""
+    """Save extracted tables and text to files and return their paths"""
     base_name = os.path.splitext(pdf_path)[0]
+    output_files = []
     
     # Save tables
     if tables:
         for i, table in enumerate(tables):
-            if hasattr(table, 'df'):  # Camelot table
+            if isinstance(table, pd.DataFrame):  # Camelot/Tabula table
                 csv_file = f"{base_name}_{method}_table_{i+1}.csv"
-                table.df.to_csv(csv_file, index=False)
+                table.to_csv(csv_file, index=False)
+                output_files.append(csv_file)
                 print(f"Saved {csv_file}")
-            elif isinstance(table, pd.DataFrame):  # Tabula/pdfplumber table
+            elif isinstance(table, dict):  # pdfplumber table (raw rows)
                 csv_file = f"{base_name}_{method}_table_{i+1}.csv"
-                table.to_csv(csv_file, index=False)
+                header, *rows = table['rows']
+                with open(csv_file, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow([*header, 'Page', 'Table'])
+                    writer.writerows([*row, table['page'], table['table_num']] for row in rows)
+                output_files.append(csv_file)
                 print(f"Saved {csv_file}")
     
     # Save text
@@ -106,6 +263,7 @@ def save_results(pdf_path, tables, text, method):
         text_file = f"{base_name}_{method}_text.txt"
         with open(text_file, "w", encoding="utf-8") as f:
             f.write(text)
+        output_files.append(text_file)
         print(f"Saved {text_file}")
     
     # Save summary as JSON
@@ -120,31 +278,56 @@ def save_results(pdf_path, tables, text, method):
     json_file = f"{base_name}_{method}_summary.json"
     with open(json_file, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
+    output_files.append(json_file)
     print(f"Saved {json_file}")
+    return output_files
 
 def main(pdf_path):
     """Main extraction function"""
     print(f"Processing: {pdf_path}")
     print("=" * 50)
     
-    # Try Camelot first (best for bordered tables)
-    camelot_tables = extract_with_camelot(pdf_path)
-    if camelot_tables:
-        text = extract_text_with_pdfplumber(pdf_path)
-        save_results(pdf_path, camelot_tables, text, "camelot")
+    base_name = os.path.splitext(pdf_path)[0]
+    cache_dir = CACHE_DIR / _pdf_fingerprint(pdf_path)
+    if _restore_from_cache(cache_dir, base_name):
+        print("\nReused cached extraction results!")
         return
     
-    # Try Tabula if Camelot failed
-    tabula_tables = extract_with_tabula(pdf_path)
-    if tabula_tables:
-        text = extract_text_with_pdfplumber(pdf_path)
-        save_results(pdf_path, tabula_tables, text, "tabula")
-        return
+    # Pages without text-showing operators (e.g. scanned images) have no
+    # tables or text for any engine to find, so they are skipped up front
+    pages = _pages_with_text(pdf_path)
+    if pages is not None:
+        print(f"{len(pages)} page(s) contain text")
+    
+    # Run all engines concurrently, but still pick the result in priority
+    # order: Camelot (best for bordered tables), then Tabula, then pdfplumber
+    executor = ThreadPoolExecutor(max_workers=4)
+    futures = {
+        "camelot": executor.submit(extract_with_camelot, pdf_path, pages),
+        "tabula": executor.submit(extract_with_tabula, pdf_path, pages),
+        "pdfplumber": executor.submit(extract_with_pdfplumber, pdf_path, pages),
+    }
+    text_future = executor.submit(extract_text_with_pypdf2, pdf_path)
+    
+    for method in ("camelot", "tabula"):
+        tables = futures[method].result()
+        if tables:
+            text = text_future.result()
+            if not _text_is_usable(text):
+                # PyPDF2 could not decode this PDF's text; use pdfplumber's
+                text = futures["pdfplumber"].result()[1] or text
+            break
+    else:
+        # Fallback to pdfplumber, which extracted the text in the same pass
+        method = "pdfplumber"
+        tables, text = futures[method].result()
+    # Don't wait for lower-priority engines before saving. They all started
+    # right away (one thread each) and threads can't be interrupted, so any
+    # still running finish in the background and the script exits after them.
+    executor.shutdown(wait=False)
     
-    # Fallback to pdfplumber
-    pdfplumber_tables = extract_with_pdfplumber(pdf_path)
-    text = extract_text_with_pdfplumber(pdf_path)
-    save_results(pdf_path, pdfplumber_tables, text, "pdfplumber")
+    output_files = save_results(pdf_path, tables, text, method)
+    _store_in_cache(cache_dir, base_name, output_files)
     
     print("\nExtraction completed!")
 
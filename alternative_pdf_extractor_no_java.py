@@ -6,9 +6,53 @@ Uses Camelot and pdfplumber for table extraction without requiring Java/Tabula.
 
 import sys
 import os
+import gc
 import json
 import pandas as pd
 from pathlib import Path
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+# Camelot keeps every rendered page image alive for the whole read_pdf call,
+# so long PDFs are read in page chunks to bound peak memory
+CAMELOT_CHUNK_PAGES = int(os.environ.get("CAMELOT_CHUNK_PAGES", 50))
+
+def _page_count(pdf_path):
+    """Return the number of pages in the PDF"""
+    from PyPDF2 import PdfReader
+    return len(PdfReader(pdf_path).pages)
+
+# A bordered table draws more lines/rectangles than this; pages with fewer
+# (a single underline or page frame) are not worth a Camelot Lattice pass
+MIN_RULING_OBJECTS = 4
+
+def has_table_rulings(page):
+    """Whether a pdfplumber page draws enough lines for a bordered table."""
+    return len(page.lines) + len(page.rects) > MIN_RULING_OBJECTS
+
+def _pages_with_rulings(pdf_path):
+    """Return the 1-based numbers of pages that draw enough lines for a bordered table."""
+    import pdfplumber
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            if has_table_rulings(page):
+                pages.append(page_num)
+            page.close()  # Drop the parsed objects before the next page
+    return pages
+
+def _read_camelot_chunked(camelot, pdf_path, pages, **kwargs):
+    """Run camelot.read_pdf chunk by chunk, keeping only each table's page and DataFrame"""
+    results = []
+    for start in range(0, len(pages), CAMELOT_CHUNK_PAGES):
+        chunk = pages[start:start + CAMELOT_CHUNK_PAGES]
+        tables = camelot.read_pdf(pdf_path, pages=",".join(map(str, chunk)), **kwargs)
+        results.extend((int(table.page), table.df) for table in tables)
+        # Release the Table objects (and their page images) before the next chunk
+        del tables
+        gc.collect()
+    return results
 
 def extract_with_camelot(pdf_path):
     """Extract tables using Camelot."""
@@ -16,25 +60,32 @@ def extract_with_camelot(pdf_path):
         import camelot.io as camelot
         print("Trying Camelot...")
         
-        # Try different table detection methods
-        tables = []
+        n_pages = _page_count(pdf_path)
         
-        # Method 1: Lattice (for tables with borders)
-        try:
-            lattice_tables = camelot.read_pdf(pdf_path, pages='all', flavor='lattice')
-            tables.extend(lattice_tables)
-            print(f"  Lattice method found {len(lattice_tables)} tables")
-        except Exception as e:
-            print(f"  Lattice method failed: {e}")
+        # Method 1: Lattice (for tables with borders). It can only find
+        # tables drawn with ruling lines, so it skips pages without them.
+        lattice_tables = []
+        lattice_pages = _pages_with_rulings(pdf_path)
+        if lattice_pages:
+            try:
+                lattice_tables = _read_camelot_chunked(camelot, pdf_path, lattice_pages, flavor='lattice')
+                print(f"  Lattice method found {len(lattice_tables)} tables")
+            except Exception as e:
+                print(f"  Lattice method failed: {e}")
         
-        # Method 2: Stream (for tables without borders)
-        try:
-            stream_tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
-            tables.extend(stream_tables)
-            print(f"  Stream method found {len(stream_tables)} tables")
-        except Exception as e:
-            print(f"  Stream method failed: {e}")
+        # Method 2: Stream (for tables without borders), only on the pages
+        # where Lattice found nothing
+        stream_tables = []
+        found_pages = {page for page, _ in lattice_tables}
+        stream_pages = [page for page in range(1, n_pages + 1) if page not in found_pages]
+        if stream_pages:
+            try:
+                stream_tables = _read_camelot_chunked(camelot, pdf_path, stream_pages, flavor='stream')
+                print(f"  Stream method found {len(stream_tables)} tables")
+            except Exception as e:
+                print(f"  Stream method failed: {e}")
         
+        tables = [df for _, df in lattice_tables + stream_tables]
         if tables:
             print(f"  Total Camelot tables: {len(tables)}")
             return tables
@@ -49,32 +100,74 @@ def extract_with_camelot(pdf_path):
         print(f"Camelot error: {e}")
         return []
 
+def _extract_page(page):
+    """Extract tables and text from a single pdfplumber page."""
+    tables = []
+    # page.objects parses the page once and caches the result, so the
+    # table finder and extract_text below share that single parse. The
+    # default table strategy builds cells from ruling lines, so pages
+    # without line/rect/curve objects cannot contain a table.
+    objects = page.objects
+    has_rulings = any(objects.get(kind) for kind in ('line', 'rect', 'curve'))
+    
+    # Extract tables
+    page_tables = page.extract_tables() if has_rulings else []
+    if page_tables:
+        for table_num, table in enumerate(page_tables):
+            if table and any(any(cell for cell in row) for row in table):
+                tables.append({
+                    'page': page.page_number,
+                    'table_num': table_num + 1,
+                    'data': table
+                })
+    
+    # Extract text
+    text = page.extract_text()
+    return tables, text
+
+def _extract_pages(pdf_path, page_nums):
+    """Extract tables and text from a batch of pages (runs in a worker process)."""
+    import pdfplumber
+    results = []
+    # Each worker re-opens the PDF (pdfminer page objects are not picklable),
+    # but only once per batch: the open PDF's resource manager caches parsed
+    # fonts, so the pages of a batch share them
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in page_nums:
+            page = pdf.pages[page_num]
+            results.append(_extract_page(page))
+            page.close()  # Drop the parsed objects before the next page
+    return results
+
+def _page_batches(page_nums, max_workers):
+    """Split page numbers into contiguous batches, a few per worker to balance load."""
+    page_nums = list(page_nums)
+    size = max(1, -(-len(page_nums) // (max_workers * 4)))
+    return [page_nums[i:i + size] for i in range(0, len(page_nums), size)]
+
 def extract_with_pdfplumber(pdf_path):
     """Extract tables and text using pdfplumber."""
     try:
         import pdfplumber
         print("Trying pdfplumber...")
         
+        with pdfplumber.open(pdf_path) as pdf:
+            n_pages = len(pdf.pages)
+        
         tables = []
         all_text = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                # Extract tables
-                page_tables = page.extract_tables()
-                if page_tables:
-                    for table_num, table in enumerate(page_tables):
-                        if table and any(any(cell for cell in row) for row in table):
-                            tables.append({
-                                'page': page_num + 1,
-                                'table_num': table_num + 1,
-                                'data': table
-                            })
-                
-                # Extract text
-                text = page.extract_text()
-                if text:
-                    all_text.append(text)
+        max_workers = max(1, min(os.cpu_count() or 1, n_pages))
+        # spawn: the pool may be started from a worker thread (see main)
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            # map() yields batches, and each batch its pages, in page order
+            batches = _page_batches(range(n_pages), max_workers)
+            for batch in executor.map(partial(_extract_pages, pdf_path), batches):
+                for page_tables, text in batch:
+                    tables.extend(page_tables)
+                    if text:
+                        all_text.append(text)
         
         print(f"  pdfplumber found {len(tables)} tables")
         return tables, '\n'.join(all_text)
@@ -92,9 +185,8 @@ def save_results(pdf_path, camelot_tables, pdfplumber_tables, pdfplumber_text):
     
     # Save Camelot tables
     if camelot_tables:
-        for i, table in enumerate(camelot_tables):
+        for i, df in enumerate(camelot_tables):
             try:
-                df = table.df
                 if not df.empty:
                     filename = f"{base_name}_camelot_table_{i+1}.csv"
                     df.to_csv(filename, index=False)
@@ -145,11 +237,12 @@ def main(pdf_path):
     print(f"Extracting from: {pdf_path}")
     print("=" * 50)
     
-    # Extract with Camelot
-    camelot_tables = extract_with_camelot(pdf_path)
-    
-    # Extract with pdfplumber
-    pdfplumber_tables, pdfplumber_text = extract_with_pdfplumber(pdf_path)
+    # Extract with Camelot and pdfplumber concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        camelot_future = executor.submit(extract_with_camelot, pdf_path)
+        pdfplumber_future = executor.submit(extract_with_pdfplumber, pdf_path)
+        camelot_tables = camelot_future.result()
+        pdfplumber_tables, pdfplumber_text = pdfplumber_future.result()
     
     # Save results
     save_results(pdf_path, camelot_tables, pdfplumber_tables, pdfplumber_text)
@@ -1,14 +1,27 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import os
+import csv
 import json
-import markdown
 import io
-import base64
-from typing import List, Dict, Any
-import PyPDF2
-import pdfplumber
+import re
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple
 from pathlib import Path
 
+# orjson is optional; it serializes the large "content" list much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# With pyarrow installed, the CSV preview keeps line text in one contiguous
+# Arrow buffer instead of a column of Python str objects
+STRING_DTYPE = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
+
 # Page configuration
 st.set_page_config(
     page_title="PDF to Markdown/JSON/CSV Converter",
@@ -16,100 +29,195 @@ st.set_page_config(
     layout="wide"
 )
 
-def extract_text_from_pdf(pdf_file) -> str:
-    """Extract text from PDF using multiple methods for better results."""
-    try:
-        # Try pdfplumber first (better for complex layouts)
-        with pdfplumber.open(pdf_file) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        if text.strip():
-            return text
-        
-        # Fallback to PyPDF2
-        pdf_file.seek(0)  # Reset file pointer
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text
-    except Exception as e:
-        st.error(f"Error extracting text from PDF: {str(e)}")
-        return ""
+def _text_is_usable(text: str) -> bool:
+    """Reject empty or mostly undecodable text."""
+    return len(text.strip()) >= 50 and text.count("\ufffd") <= len(text) * 0.05
 
-def process_pdf_to_markdown(text: str) -> str:
-    """Convert extracted text to markdown format."""
-    if not text.strip():
-        return "# No text extracted from PDF"
+def _extract_text(pdf_bytes: bytes) -> str:
+    """Extract text from PDF bytes (runs in a worker process)."""
+    # PDF libraries are imported here rather than at module level so that
+    # Streamlit reruns that never extract anything don't pay for them
+    import PyPDF2
     
-    # Simple markdown conversion
-    lines = text.split('\n')
-    markdown_lines = []
+    pdf_file = io.BytesIO(pdf_bytes)
     
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Simple heuristics for markdown formatting
-        if line.isupper() and len(line) > 3:
-            markdown_lines.append(f"## {line}")
-        elif line.endswith(':') and len(line) < 50:
-            markdown_lines.append(f"### {line}")
-        else:
-            markdown_lines.append(line)
+    # Try PyPDF2 first (no layout analysis, much faster)
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    text = "\n".join((page.extract_text() or "") for page in pdf_reader.pages)
+    
+    if _text_is_usable(text):
+        return text
+    
+    # Fallback to pdfplumber (better for complex layouts). pdfplumber never
+    # runs pdfminer's LAParams layout analysis unless asked to; on top of
+    # that, extract_text_simple() clusters characters straight into lines
+    # and skips extract_text()'s word-level pass.
+    import pdfplumber
+    pdf_file.seek(0)  # Reset file pointer
+    with pdfplumber.open(pdf_file) as pdf:
+        pdfplumber_text = "\n".join(
+            page_text for page in pdf.pages
+            if (page_text := page.extract_text_simple(x_tolerance=3, y_tolerance=3))
+        )
     
-    return '\n\n'.join(markdown_lines)
+    return pdfplumber_text if pdfplumber_text.strip() else text
+
+@st.cache_resource
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Worker processes for PDF parsing, shared by all sessions."""
+    # spawn rather than fork: the Streamlit server process is multi-threaded
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+@st.cache_data(show_spinner=False)
+def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+    """Extract text from PDF using multiple methods for better results."""
+    # Parsing is CPU-bound pure Python, so it runs outside this process
+    return _get_process_pool().submit(_extract_text, pdf_bytes).result()
+
+# Lines that may be headings: no lowercase ASCII letters (ALL CAPS candidate)
+# or short lines ending in ':'. _format_heading applies the exact rules.
+_HEADING_RE = re.compile(r'^(?:[^a-z\n]{4,}|.{0,48}:)$', re.MULTILINE)
 
-def process_pdf_to_json(text: str, filename: str) -> Dict[str, Any]:
-    """Convert extracted text to JSON format."""
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+def _format_heading(match) -> str:
+    """Format a heading candidate matched by _HEADING_RE."""
+    line = match.group()
+    if line.isupper() and len(line) > 3:
+        return f"## {line}"
+    elif line.endswith(':') and len(line) < 50:
+        return f"### {line}"
+    return line
+
+def process_pdf_to_markdown(lines: List[str]) -> str:
+    """Convert the non-empty stripped lines of the text to markdown format."""
+    if not lines:
+        return "# No text extracted from PDF"
     
+    # Simple markdown conversion: tag headings with a single regex pass
+    # over the whole text instead of a per-line loop
+    return _HEADING_RE.sub(_format_heading, '\n'.join(lines)).replace('\n', '\n\n')
+
+def process_pdf_to_json(lines: List[str], filename: str, word_count: int, char_count: int) -> Dict[str, Any]:
+    """Convert the lines and counts of the text to JSON format."""
     return {
         "filename": filename,
         "total_lines": len(lines),
         "content": lines,
         "summary": {
-            "word_count": len(text.split()),
-            "character_count": len(text),
+            "word_count": word_count,
+            "character_count": char_count,
             "line_count": len(lines)
         }
     }
 
-def process_pdf_to_csv(text: str) -> pd.DataFrame:
-    """Convert extracted text to CSV format."""
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    
-    # Create a DataFrame with line numbers and content
+def dump_json(data) -> bytes:
+    """Serialize data as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode()
+
+def process_pdf_to_csv(lines: List[str], word_counts: List[int]) -> pd.DataFrame:
+    """Convert the lines of the text and their word counts to CSV format."""
+    # Create a DataFrame with line numbers and content; the character
+    # counts are computed by pandas' vectorized string methods
+    content = pd.Series(lines, dtype=STRING_DTYPE)
     df = pd.DataFrame({
-        'Line_Number': range(1, len(lines) + 1),
-        'Content': lines,
-        'Word_Count': [len(line.split()) for line in lines],
-        'Character_Count': [len(line) for line in lines]
+        'Line_Number': np.arange(1, len(lines) + 1, dtype=np.int32),
+        'Content': content,
+        'Word_Count': word_counts,
+        'Character_Count': content.str.len()
     })
     
     return df
 
-def get_download_link(data, filename: str, file_type: str):
-    """Generate download link for files."""
-    if file_type == "csv":
-        csv = data.to_csv(index=False)
-        b64 = base64.b64encode(csv.encode()).decode()
-        href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">Download CSV file</a>'
-    elif file_type == "json":
-        json_str = json.dumps(data, indent=2, ensure_ascii=False)
-        b64 = base64.b64encode(json_str.encode()).decode()
-        href = f'<a href="data:file/json;base64,{b64}" download="{filename}.json">Download JSON file</a>'
-    elif file_type == "markdown":
-        b64 = base64.b64encode(data.encode()).decode()
-        href = f'<a href="data:file/markdown;base64,{b64}" download="{filename}.md">Download Markdown file</a>'
+def process_pdf_to_csv_bytes(lines: List[str], word_counts: List[int]) -> bytes:
+    """Serialize the line-by-line CSV straight from the lines, without pandas."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(['Line_Number', 'Content', 'Word_Count', 'Character_Count'])
+    writer.writerows(
+        (line_number, line, word_count, len(line))
+        for line_number, (line, word_count) in enumerate(zip(lines, word_counts), 1)
+    )
+    return buffer.getvalue().encode()
+
+@st.cache_data(show_spinner=False)
+def convert_text(text: str, filename: str, output_format: str) -> Tuple[Any, bytes]:
+    """Convert extracted text to the selected format; return (preview data, download bytes)."""
+    # Split the text once and hand the lines to whichever formatter runs
+    lines = [stripped for line in text.split('\n') if (stripped := line.strip())]
     
-    return href
+    if output_format == "Markdown":
+        data = process_pdf_to_markdown(lines)
+        return data, data.encode()
+    elif output_format == "JSON":
+        data = process_pdf_to_json(lines, filename, len(text.split()), len(text))
+        return data, dump_json(data)
+    elif output_format == "CSV":
+        # Words are counted with str.split() for both the preview and the
+        # download; the Arrow string dtype's \S is ASCII-only and would
+        # not split on non-breaking or other Unicode spaces
+        word_counts = [len(line.split()) for line in lines]
+        return process_pdf_to_csv(lines, word_counts), process_pdf_to_csv_bytes(lines, word_counts)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+# Rows rendered in the CSV preview; the download always has every line
+CSV_PREVIEW_ROWS = 200
+
+# Download button label, file extension and MIME type per output format
+DOWNLOAD_OPTIONS = {
+    "Markdown": ("Download Markdown file", "md", "text/markdown"),
+    "JSON": ("Download JSON file", "json", "application/json"),
+    "CSV": ("Download CSV file", "csv", "text/csv"),
+}
+
+def _process_one(pdf_bytes: bytes, filename: str, output_format: str) -> Dict[str, Any]:
+    """Extract one uploaded PDF and convert it to the selected format."""
+    result = {"filename": filename, "error": None, "data": None, "download": None}
+    try:
+        text = extract_text_from_pdf(pdf_bytes)
+    except Exception as e:
+        result["error"] = f"Error extracting text from PDF: {str(e)}"
+        return result
+    
+    if not text.strip():
+        return result
+    
+    # Process based on selected format
+    result["data"], result["download"] = convert_text(text, filename, output_format)
+    return result
+
+def render_result(result: Dict[str, Any], output_format: str, file_index: int):
+    """Show the preview and download button for one processed PDF."""
+    if result["error"]:
+        st.error(result["error"])
+        return
+    if result["data"] is None:
+        st.error("No text could be extracted from this PDF.")
+        return
+    
+    processed_data = result["data"]
+    if output_format == "Markdown":
+        st.text_area("Preview:", processed_data, height=200)
+    elif output_format == "JSON":
+        st.json(processed_data)
+    elif output_format == "CSV":
+        st.dataframe(processed_data.head(CSV_PREVIEW_ROWS))
+        if len(processed_data) > CSV_PREVIEW_ROWS:
+            st.caption(f"Showing the first {CSV_PREVIEW_ROWS} of {len(processed_data):,} lines")
+    
+    # Download button
+    label, extension, mime = DOWNLOAD_OPTIONS[output_format]
+    base_name = result["filename"].replace('.pdf', '')
+    st.download_button(
+        label,
+        result["download"],
+        file_name=f"{base_name}.{extension}",
+        mime=mime,
+        key=f"download_{file_index}"
+    )
 
 def main():
     st.title("📄 PDF to Markdown/JSON/CSV Converter")
@@ -133,56 +241,35 @@ def main():
             help="Choose the format you want to download"
         )
         
-        # Process button
+        # Process button; results stay on screen across reruns (format
+        # switches, download clicks) until the set of uploads changes, and
+        # the cached functions make those reruns cheap
+        upload_key = [(f.name, f.size) for f in uploaded_files]
         if st.button("Process PDF(s)", type="primary"):
+            st.session_state.processed_uploads = upload_key
+        
+        if st.session_state.get("processed_uploads") == upload_key:
+            # One container per file keeps the upload order on screen while
+            # results are filled in as soon as each file finishes
+            containers = []
+            for uploaded_file in uploaded_files:
+                container = st.container()
+                container.subheader(f"Processing: {uploaded_file.name}")
+                containers.append(container)
+                st.divider()
+            
             with st.spinner("Processing PDF(s)..."):
-                for uploaded_file in uploaded_files:
-                    st.subheader(f"Processing: {uploaded_file.name}")
-                    
-                    # Extract text from PDF
-                    text = extract_text_from_pdf(uploaded_file)
-                    
-                    if text.strip():
-                        # Process based on selected format
-                        if output_format == "Markdown":
-                            processed_data = process_pdf_to_markdown(text)
-                            st.text_area("Preview:", processed_data, height=200)
-                            
-                            # Download link
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "markdown"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                            
-                        elif output_format == "JSON":
-                            processed_data = process_pdf_to_json(text, uploaded_file.name)
-                            st.json(processed_data)
-                            
-                            # Download link
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "json"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                            
-                        elif output_format == "CSV":
-                            processed_data = process_pdf_to_csv(text)
-                            st.dataframe(processed_data)
-                            
-                            # Download link
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "csv"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                    else:
-                        st.error("No text could be extracted from this PDF.")
-                    
-                    st.divider()
+                max_workers = min(len(uploaded_files), os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(_process_one, uploaded_file.getvalue(), uploaded_file.name, output_format): file_index
+                        for file_index, uploaded_file in enumerate(uploaded_files)
+                    }
+                    # Streamlit elements must be created on the script thread
+                    for future in as_completed(futures):
+                        file_index = futures[future]
+                        with containers[file_index]:
+                            render_result(future.result(), output_format, file_index)
     else:
         st.info("👆 Please upload PDF file(s) to get started!")
         
@@ -192,7 +279,7 @@ def main():
             1. **Upload PDF(s)**: Click the upload button and select one or more PDF files
             2. **Choose Format**: Select your desired output format (Markdown, JSON, or CSV)
             3. **Process**: Click the 'Process PDF(s)' button
-            4. **Download**: Use the download links to save your converted files
+            4. **Download**: Use the download buttons to save your converted files
             
             **Supported Formats:**
             - **Markdown**: Clean, formatted text with basic structure
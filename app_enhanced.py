@@ -1,29 +1,26 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
-import markdown
 import io
-import base64
-from typing import List, Dict, Any, Optional
-import PyPDF2
-import pdfplumber
-from pathlib import Path
+import os
+import re
+import zipfile
+import threading
+import multiprocessing
+import importlib.util
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-# Try to import docling for enhanced processing
+# orjson is optional; it serializes the large "content" list much faster
 try:
-    import docling
-    # Check if docling has the expected API
-    if hasattr(docling, 'Document'):
-        DOCLING_AVAILABLE = True
-        DOCLING_DOCUMENT_AVAILABLE = True
-    else:
-        DOCLING_AVAILABLE = True
-        DOCLING_DOCUMENT_AVAILABLE = False
-        st.warning("Docling available but Document class not found. Using standard processing.")
+    import orjson
 except ImportError:
-    DOCLING_AVAILABLE = False
-    DOCLING_DOCUMENT_AVAILABLE = False
-    st.warning("Docling not available. Install with: pip install docling")
+    orjson = None
+
+# With pyarrow installed, line text is kept in one contiguous Arrow buffer
+# instead of a column of Python str objects
+STRING_DTYPE = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
 
 # Page configuration
 st.set_page_config(
@@ -32,118 +29,200 @@ st.set_page_config(
     layout="wide"
 )
 
-def extract_text_with_docling(pdf_file) -> str:
+# PDF libraries (PyMuPDF, pdfplumber, docling) are imported inside the
+# functions that use them, so starting the app and rerunning the script
+# don't pay for importing them until a PDF is actually processed
+
+def _text_is_usable(text: str) -> bool:
+    """Reject empty or mostly undecodable text."""
+    return len(text.strip()) >= 50 and text.count("\ufffd") <= len(text) * 0.05
+
+@st.cache_resource(show_spinner=False)
+def _docling_status() -> str:
+    """Check once whether docling and its converter API are installed: "ok", "incompatible" or "missing"."""
+    if importlib.util.find_spec("docling") is None:
+        return "missing"
+    if importlib.util.find_spec("docling.document_converter") is None:
+        return "incompatible"
+    return "ok"
+
+@st.cache_resource(show_spinner=False)
+def _get_docling_converter():
+    """Build the docling converter once; its layout models load on first use."""
+    from docling.document_converter import DocumentConverter
+    return DocumentConverter()
+
+@st.cache_resource(show_spinner=False)
+def _get_docling_lock() -> threading.Lock:
+    """Serializes use of the shared docling converter across upload threads."""
+    return threading.Lock()
+
+def extract_text_with_docling(pdf_bytes: bytes, filename: str) -> str:
     """Extract text using docling for enhanced processing."""
-    if not DOCLING_AVAILABLE or not DOCLING_DOCUMENT_AVAILABLE:
+    if _docling_status() != "ok":
         return ""
+    from docling.datamodel.base_models import DocumentStream
     
-    try:
-        # Save uploaded file temporarily
-        temp_path = Path(f"temp_{pdf_file.name}")
-        with open(temp_path, "wb") as f:
-            f.write(pdf_file.getvalue())
-        
-        # Use docling to process the document
-        doc = docling.Document(temp_path)
-        text = doc.text
-        
-        # Clean up temp file
-        temp_path.unlink()
-        
-        return text
-    except Exception as e:
-        st.warning(f"Docling processing failed: {str(e)}")
-        return ""
+    # Use docling to process the document, straight from memory. The one
+    # converter is shared by every upload thread and session, so calls to
+    # it take turns.
+    with _get_docling_lock():
+        result = _get_docling_converter().convert(
+            DocumentStream(name=filename, stream=io.BytesIO(pdf_bytes))
+        )
+    return result.document.export_to_text()
 
-def extract_text_from_pdf(pdf_file) -> str:
-    """Extract text from PDF using multiple methods for better results."""
-    try:
-        # Try docling first if available
-        if DOCLING_AVAILABLE:
-            docling_text = extract_text_with_docling(pdf_file)
-            if docling_text.strip():
-                return docling_text
-        
-        # Try pdfplumber (better for complex layouts)
-        with pdfplumber.open(pdf_file) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        if text.strip():
-            return text
-        
-        # Fallback to PyPDF2
-        pdf_file.seek(0)  # Reset file pointer
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text
-    except Exception as e:
-        st.error(f"Error extracting text from PDF: {str(e)}")
-        return ""
+def extract_tables_from_pdf(pdf_bytes: bytes, pages: Optional[List[int]] = None) -> List[pd.DataFrame]:
+    """Extract tables from PDF using pdfplumber, optionally from the given 1-based pages only."""
+    import pdfplumber
+    raw_tables = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes), pages=pages) as pdf:
+        for page in pdf.pages:
+            page_tables = page.extract_tables()
+            for table_num, table in enumerate(page_tables):
+                if table:
+                    raw_tables.append((page.page_number, table_num + 1, table))
+    
+    # Build each DataFrame once the PDF is closed, with the Page/Table
+    # columns passed in at construction rather than assigned afterwards.
+    # Cells use the (Arrow-backed when available) string dtype; empty
+    # cells become <NA>.
+    return [
+        pd.DataFrame(rows[1:], columns=rows[0], dtype=STRING_DTYPE).assign(Page=page_num, Table=table_num)
+        for page_num, table_num, rows in raw_tables
+    ]
 
-def extract_tables_from_pdf(pdf_file) -> List[pd.DataFrame]:
-    """Extract tables from PDF using pdfplumber."""
-    tables = []
+def _scan_pdf(pdf_bytes: bytes, find_drawings: bool) -> Tuple[List[str], List[int]]:
+    """Return the text of every page and which pages draw lines or shapes (runs in a worker process)."""
+    import fitz  # PyMuPDF
+    page_texts = []
+    drawn_pages = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page in doc:
+            page_texts.append(page.get_text("text"))
+            if find_drawings and page.get_drawings():
+                drawn_pages.append(page.number + 1)
+    return page_texts, drawn_pages
+
+@st.cache_resource
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Worker processes for PyMuPDF scans and pdfplumber tables, shared by all sessions."""
+    # spawn rather than fork: the Streamlit server process is multi-threaded
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+# Extraction is cached on the PDF bytes, so reruns of the app (another
+# output format, pressing Process again) skip re-parsing the same upload.
+# It runs on worker threads (see main), so instead of calling st.* it
+# returns its (level, message) notes for the script thread to render.
+@st.cache_data(max_entries=16, show_spinner=False)
+def extract_all(pdf_bytes: bytes, filename: str, extract_tables: bool = True) -> Tuple[str, Optional[List[pd.DataFrame]], List[Tuple[str, str]]]:
+    """Extract text and, if requested, tables from PDF in a single PyMuPDF pass, with docling as fallback."""
+    messages = []
+    
+    # One PyMuPDF (MuPDF's C parser) pass reads the text and finds the pages
+    # that draw any lines or shapes. pdfplumber's table finder builds cells
+    # from ruling lines, so only those pages are handed to it.
+    text = ""
+    table_pages = None  # None: scan failed, let pdfplumber try every page
     try:
-        with pdfplumber.open(pdf_file) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                page_tables = page.extract_tables()
-                for table_num, table in enumerate(page_tables):
-                    if table:
-                        df = pd.DataFrame(table[1:], columns=table[0])
-                        df['Page'] = page_num + 1
-                        df['Table'] = table_num + 1
-                        tables.append(df)
+        # PyMuPDF holds the GIL and is not thread-safe, and extract_all runs
+        # on one thread per upload, so the scan happens in a worker process
+        future = _get_process_pool().submit(_scan_pdf, pdf_bytes, extract_tables)
+        page_texts, drawn_pages = future.result()
+        text = "\n".join(page_texts)
+        table_pages = drawn_pages
     except Exception as e:
-        st.warning(f"Table extraction failed: {str(e)}")
+        messages.append(("error", f"Error extracting text from PDF: {str(e)}"))
+    
+    # docling's layout models are far heavier than PyMuPDF, so they only run
+    # when the PDF has no usable text layer (e.g. scanned pages)
+    if not _text_is_usable(text) and _docling_status() == "ok":
+        try:
+            docling_text = extract_text_with_docling(pdf_bytes, filename)
+            if docling_text.strip():
+                text = docling_text
+        except Exception as e:
+            messages.append(("warning", f"Docling processing failed: {str(e)}"))
     
-    return tables
+    tables = None
+    if extract_tables:
+        tables = []
+        if table_pages != []:
+            try:
+                # pdfplumber is pure Python, so it also runs in a worker
+                # process where uploads processed side by side don't share the GIL
+                future = _get_process_pool().submit(extract_tables_from_pdf, pdf_bytes, table_pages)
+                tables = future.result()
+            except Exception as e:
+                messages.append(("warning", f"Table extraction failed: {str(e)}"))
+    return text, tables, messages
 
+# Heading patterns for process_pdf_to_markdown. Lines of 4+ characters with
+# no lowercase ASCII letter are ALL CAPS candidates (confirmed with
+# str.isupper() on those lines only); lines under 50 characters ending in
+# ':' are subheadings.
+_H2_CANDIDATE_RE = re.compile(r'[^a-z]{4,}')
+_H3_RE = re.compile(r'.{0,48}:')
+
+def table_to_markdown(df: pd.DataFrame) -> str:
+    """Render a DataFrame as a markdown table without going through tabulate."""
+    # Cells may hold None, pipes or line breaks (pdfplumber keeps wrapped
+    # cell text); blank, escape and flatten them once for the whole frame
+    body = df.fillna("").astype(str).replace({r"\|": r"\\|", r"\n": " "}, regex=True)
+    columns = [str(col).replace("|", "\\|").replace("\n", " ") for col in df.columns]
+    
+    header = "| " + " | ".join(columns) + " |"
+    separator = "| " + " | ".join(["---"] * len(columns)) + " |"
+    rows = ["| " + " | ".join(row) + " |" for row in body.itertuples(index=False, name=None)]
+    return "\n".join([header, separator, *rows])
+
+@st.cache_data(max_entries=16, show_spinner=False)
 def process_pdf_to_markdown(text: str, tables: Optional[List[pd.DataFrame]] = None) -> str:
     """Convert extracted text to markdown format with table support."""
     if not text.strip() and not tables:
         return "# No text extracted from PDF"
     
-    markdown_parts = []
+    # Sections are written straight into one buffer, separated by blank lines
+    buffer = io.StringIO()
     
     # Process text
     if text.strip():
-        lines = text.split('\n')
-        markdown_lines = []
+        lines = pd.Series(
+            [stripped for line in text.split('\n') if (stripped := line.strip())],
+            dtype=STRING_DTYPE
+        )
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Simple heuristics for markdown formatting
-            if line.isupper() and len(line) > 3:
-                markdown_lines.append(f"## {line}")
-            elif line.endswith(':') and len(line) < 50:
-                markdown_lines.append(f"### {line}")
-            else:
-                markdown_lines.append(line)
+        # Simple heuristics for markdown formatting, evaluated as whole-column
+        # masks with pandas' string methods instead of a per-line loop
+        h2_candidates = lines.str.fullmatch(_H2_CANDIDATE_RE.pattern)
+        is_h2 = h2_candidates & lines.where(h2_candidates, "").str.isupper()
+        is_h3 = ~is_h2 & lines.str.fullmatch(_H3_RE.pattern)
+        markdown_lines = lines.mask(is_h2, "## " + lines).mask(is_h3, "### " + lines)
         
-        markdown_parts.append('\n\n'.join(markdown_lines))
+        buffer.write(markdown_lines.str.cat(sep='\n\n'))
     
     # Process tables
     if tables:
-        markdown_parts.append("\n## Tables\n")
+        if buffer.tell():
+            buffer.write('\n\n')
+        buffer.write("\n## Tables\n")
         for i, table in enumerate(tables):
-            markdown_parts.append(f"\n### Table {i+1} (Page {table['Page'].iloc[0]})\n")
-            markdown_parts.append(table.to_markdown(index=False))
+            buffer.write(f"\n\n\n### Table {i+1} (Page {table['Page'].iloc[0]})\n\n\n")
+            buffer.write(table_to_markdown(table))
     
-    return '\n\n'.join(markdown_parts)
+    return buffer.getvalue()
+
+def _table_records(df: pd.DataFrame) -> List[Dict[Any, Any]]:
+    """Return the rows of a table as dicts, with missing cells as None (JSON null)."""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
 
+@st.cache_data(max_entries=16, show_spinner=False)
 def process_pdf_to_json(text: str, filename: str, tables: Optional[List[pd.DataFrame]] = None) -> Dict[str, Any]:
     """Convert extracted text to JSON format with table support."""
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    lines = [stripped for line in text.split('\n') if (stripped := line.strip())]
     
     result = {
         "filename": filename,
@@ -166,24 +245,37 @@ def process_pdf_to_json(text: str, filename: str, tables: Optional[List[pd.DataF
                 "page": int(table['Page'].iloc[0]),
                 "rows": len(table),
                 "columns": len(table.columns) - 2,  # Exclude Page and Table columns
-                "data": table.drop(['Page', 'Table'], axis=1).to_dict('records')
+                "data": _table_records(table.drop(['Page', 'Table'], axis=1))
             }
             result["tables"].append(table_data)
     
     return result
 
+def dump_json(data) -> bytes:
+    """Serialize data as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(data, indent=2, ensure_ascii=False).encode()
+
+@st.cache_data(max_entries=16, show_spinner=False)
 def process_pdf_to_csv(text: str, tables: Optional[List[pd.DataFrame]] = None) -> Dict[str, pd.DataFrame]:
     """Convert extracted text to CSV format with table support."""
     result = {}
     
     # Text content
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    lines = [stripped for line in text.splitlines() if (stripped := line.strip())]
     if lines:
+        # Words are counted with str.split(); the Arrow string dtype's \S
+        # is ASCII-only and would not split on Unicode spaces such as NBSP
+        content = pd.Series(lines, dtype=STRING_DTYPE)
         text_df = pd.DataFrame({
-            'Line_Number': range(1, len(lines) + 1),
-            'Content': lines,
+            'Line_Number': np.arange(1, len(lines) + 1),
+            'Content': content,
             'Word_Count': [len(line.split()) for line in lines],
-            'Character_Count': [len(line) for line in lines]
+            'Character_Count': content.str.len()
         })
         result['text_content'] = text_df
     
@@ -194,46 +286,25 @@ def process_pdf_to_csv(text: str, tables: Optional[List[pd.DataFrame]] = None) -
     
     return result
 
-def get_download_link(data, filename: str, file_type: str):
-    """Generate download link for files."""
-    if file_type == "csv":
-        if isinstance(data, dict):
-            # Multiple CSV files (text + tables)
-            csv_data = data.get('text_content', pd.DataFrame())
-            if not csv_data.empty:
-                csv = csv_data.to_csv(index=False)
-                b64 = base64.b64encode(csv.encode()).decode()
-                href = f'<a href="data:file/csv;base64,{b64}" download="{filename}_text.csv">Download Text CSV</a>'
-                
-                # Add table downloads
-                for key, table_df in data.items():
-                    if key != 'text_content' and isinstance(table_df, pd.DataFrame):
-                        csv = table_df.to_csv(index=False)
-                        b64 = base64.b64encode(csv.encode()).decode()
-                        href += f'<br><a href="data:file/csv;base64,{b64}" download="{filename}_{key}.csv">Download {key.replace("_", " ").title()} CSV</a>'
-                return href
-        else:
-            csv = data.to_csv(index=False)
-            b64 = base64.b64encode(csv.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">Download CSV file</a>'
-    elif file_type == "json":
-        json_str = json.dumps(data, indent=2, ensure_ascii=False)
-        b64 = base64.b64encode(json_str.encode()).decode()
-        href = f'<a href="data:file/json;base64,{b64}" download="{filename}.json">Download JSON file</a>'
-    elif file_type == "markdown":
-        b64 = base64.b64encode(data.encode()).decode()
-        href = f'<a href="data:file/markdown;base64,{b64}" download="{filename}.md">Download Markdown file</a>'
-    
-    return href
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_csv_zip(csv_data: Dict[str, pd.DataFrame], base_name: str) -> bytes:
+    """Pack each CSV entry (text content and tables) into one in-memory ZIP file."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for key, df in csv_data.items():
+            suffix = "text" if key == 'text_content' else key
+            zf.writestr(f"{base_name}_{suffix}.csv", df.to_csv(index=False))
+    return buffer.getvalue()
 
 def main():
     st.title("📄 Enhanced PDF to Markdown/JSON/CSV Converter")
     st.markdown("Upload your PDF files and convert them to different formats with enhanced processing!")
     
     # Show docling status
-    if DOCLING_AVAILABLE and DOCLING_DOCUMENT_AVAILABLE:
+    docling_status = _docling_status()
+    if docling_status == "ok":
         st.success("✅ Docling available for enhanced processing")
-    elif DOCLING_AVAILABLE:
+    elif docling_status == "incompatible":
         st.info("ℹ️ Docling available but API not compatible. Using standard processing.")
     else:
         st.info("ℹ️ Docling not available. Using standard PDF processing.")
@@ -249,84 +320,106 @@ def main():
     if uploaded_files:
         st.success(f"Uploaded {len(uploaded_files)} file(s)")
         
-        # Processing options
-        col1, col2 = st.columns(2)
-        with col1:
-            extract_tables = st.checkbox("Extract tables", value=True, help="Extract tables from PDFs")
-        with col2:
-            output_format = st.selectbox(
-                "Select output format:",
-                ["Markdown", "JSON", "CSV"],
-                help="Choose the format you want to download"
-            )
+        # Processing options, in a form so that changing them does not
+        # rerun the app until the form is submitted
+        with st.form("processing_options"):
+            col1, col2 = st.columns(2)
+            with col1:
+                extract_tables = st.checkbox("Extract tables", value=True, help="Extract tables from PDFs")
+            with col2:
+                output_format = st.selectbox(
+                    "Select output format:",
+                    ["Markdown", "JSON", "CSV"],
+                    help="Choose the format you want to download"
+                )
+            
+            # Process button; results stay on screen across reruns (download
+            # clicks) until the set of uploads changes, and the cached
+            # functions make those reruns cheap
+            submitted = st.form_submit_button("Process PDF(s)", type="primary")
+        
+        upload_key = [(f.name, f.size) for f in uploaded_files]
+        if submitted:
+            st.session_state.processed_uploads = upload_key
         
-        # Process button
-        if st.button("Process PDF(s)", type="primary"):
+        if st.session_state.get("processed_uploads") == upload_key:
             with st.spinner("Processing PDF(s)..."):
-                for uploaded_file in uploaded_files:
-                    st.subheader(f"Processing: {uploaded_file.name}")
-                    
-                    # Extract text from PDF
-                    text = extract_text_from_pdf(uploaded_file)
-                    
-                    # Extract tables if requested
-                    tables = None
-                    if extract_tables:
-                        tables = extract_tables_from_pdf(uploaded_file)
+                # Extract all uploads concurrently on a thread pool that
+                # hands the PDF parsing to worker processes; results are
+                # rendered here, on the script thread, in upload order.
+                # getvalue() is the only copy of each upload: extract_all
+                # needs hashable bytes for its cache key, and everything
+                # downstream wraps those same bytes without copying them
+                # (fitz.open(stream=...), BytesIO for pdfplumber/docling).
+                max_workers = min(8, len(uploaded_files))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    results = executor.map(
+                        lambda f: extract_all(f.getvalue(), f.name, extract_tables),
+                        uploaded_files
+                    )
+                    for file_index, (uploaded_file, (text, tables, messages)) in enumerate(zip(uploaded_files, results)):
+                        st.subheader(f"Processing: {uploaded_file.name}")
+                        base_name = uploaded_file.name.replace('.pdf', '')
+                        
+                        for level, message in messages:
+                            getattr(st, level)(message)
                         if tables:
                             st.success(f"Found {len(tables)} table(s)")
-                    
-                    if text.strip() or tables:
-                        # Process based on selected format
-                        if output_format == "Markdown":
-                            processed_data = process_pdf_to_markdown(text, tables)
-                            st.text_area("Preview:", processed_data, height=300)
-                            
-                            # Download link
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "markdown"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                            
-                        elif output_format == "JSON":
-                            processed_data = process_pdf_to_json(text, uploaded_file.name, tables)
-                            st.json(processed_data)
-                            
-                            # Download link
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "json"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                            
-                        elif output_format == "CSV":
-                            processed_data = process_pdf_to_csv(text, tables)
-                            
-                            # Display text content
-                            if 'text_content' in processed_data:
-                                st.subheader("Text Content")
-                                st.dataframe(processed_data['text_content'])
-                            
-                            # Display tables
-                            for key, table_df in processed_data.items():
-                                if key != 'text_content':
-                                    st.subheader(f"Table {key.replace('_', ' ').title()}")
-                                    st.dataframe(table_df)
-                            
-                            # Download links
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "csv"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                    else:
-                        st.error("No text or tables could be extracted from this PDF.")
-                    
-                    st.divider()
+                        
+                        if text.strip() or tables:
+                            # Process based on selected format
+                            if output_format == "Markdown":
+                                processed_data = process_pdf_to_markdown(text, tables)
+                                st.text_area("Preview:", processed_data, height=300)
+                                
+                                # Download button
+                                st.download_button(
+                                    "Download Markdown file",
+                                    processed_data.encode("utf-8"),
+                                    file_name=f"{base_name}.md",
+                                    mime="text/markdown",
+                                    key=f"download_{file_index}"
+                                )
+                                
+                            elif output_format == "JSON":
+                                processed_data = process_pdf_to_json(text, uploaded_file.name, tables)
+                                st.json(processed_data)
+                                
+                                # Download button
+                                st.download_button(
+                                    "Download JSON file",
+                                    dump_json(processed_data),
+                                    file_name=f"{base_name}.json",
+                                    mime="application/json",
+                                    key=f"download_{file_index}"
+                                )
+                                
+                            elif output_format == "CSV":
+                                processed_data = process_pdf_to_csv(text, tables)
+                                
+                                # Display text content
+                                if 'text_content' in processed_data:
+                                    st.subheader("Text Content")
+                                    st.dataframe(processed_data['text_content'])
+                                
+                                # Display tables
+                                for key, table_df in processed_data.items():
+                                    if key != 'text_content':
+                                        st.subheader(f"Table {key.replace('_', ' ').title()}")
+                                        st.dataframe(table_df)
+                                
+                                # Download button, one ZIP with a CSV per text/table entry
+                                st.download_button(
+                                    "Download all CSVs (zip)",
+                                    build_csv_zip(processed_data, base_name),
+                                    file_name=f"{base_name}.zip",
+                                    mime="application/zip",
+                                    key=f"download_{file_index}"
+                                )
+                        else:
+                            st.error("No text or tables could be extracted from this PDF.")
+                        
+                        st.divider()
     else:
         st.info("👆 Please upload PDF file(s) to get started!")
         
@@ -336,12 +429,12 @@ def main():
             1. **Upload PDF(s)**: Click the upload button and select one or more PDF files
             2. **Choose Options**: Select whether to extract tables and your desired output format
             3. **Process**: Click the 'Process PDF(s)' button
-            4. **Download**: Use the download links to save your converted files
+            4. **Download**: Use the download buttons to save your converted files
             
             **Enhanced Features:**
             - **Docling Integration**: Better document processing when available
             - **Table Extraction**: Automatically detect and extract tables from PDFs
-            - **Multiple Outputs**: Get separate files for text and tables in CSV format
+            - **Multiple Outputs**: Get separate files for text and tables in CSV format, zipped together
             
             **Supported Formats:**
             - **Markdown**: Clean, formatted text with table support
@@ -1,13 +1,24 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import markdown
 import io
-import base64
-from typing import List, Dict, Any, Optional
-import PyPDF2
+import os
+import re
+import multiprocessing
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+import fitz  # PyMuPDF
 import pdfplumber
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# orjson is optional; it serializes large table records much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Page configuration
 st.set_page_config(
@@ -17,7 +28,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better markdown styling
-st.markdown("""
+MARKDOWN_CSS = """
 <style>
     .markdown-text-container {
         background-color: #f8f9fa;
@@ -86,229 +97,295 @@ st.markdown("""
         font-style: italic;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def extract_tables_from_pdf(pdf_bytes: bytes, pages: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Extract tables from PDF using pdfplumber, optionally from the given 1-based pages only."""
+    # Tables are kept as pdfplumber's plain header/row lists; a DataFrame is
+    # only built where one is needed (see table_to_dataframe)
+    tables = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes), pages=pages) as pdf:
+        for page in pdf.pages:
+            page_tables = page.extract_tables()
+            for table_num, table in enumerate(page_tables):
+                if table:
+                    tables.append({
+                        'header': table[0],
+                        'rows': table[1:],
+                        'page': page.page_number,
+                        'table': table_num + 1
+                    })
+    
+    return tables
+
+def table_to_dataframe(table: Dict[str, Any]) -> pd.DataFrame:
+    """Build the DataFrame for an extracted table, with its Page and Table columns."""
+    # The Page/Table values go into each row so the frame is built in one go
+    extra = [table['page'], table['table']]
+    return pd.DataFrame(
+        [row + extra for row in table['rows']],
+        columns=table['header'] + ['Page', 'Table']
+    )
+
+def _cell_text(cell) -> str:
+    return "" if cell is None else str(cell)
+
+# PDFs with more pages than this are read in parallel page ranges
+PARALLEL_MIN_PAGES = 16
 
-def extract_text_from_pdf(pdf_file) -> str:
-    """Extract text from PDF using multiple methods for better results."""
+def _page_count(pdf_bytes: bytes) -> int:
+    """Return the number of pages in the PDF (runs in a worker process)."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+def _scan_page_range(pdf_bytes: bytes, start: int, stop: int, find_drawings: bool) -> Tuple[List[str], List[int]]:
+    """Return the text of pages [start, stop) and which of them draw lines or shapes (runs in a worker process)."""
+    page_texts = []
+    drawn_pages = []
+    # Every call opens its own Document; PyMuPDF objects can't be shared
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page_num in range(start, stop):
+            page = doc[page_num]
+            page_texts.append(page.get_text("text"))
+            if find_drawings and page.get_drawings():
+                drawn_pages.append(page_num + 1)
+    return page_texts, drawn_pages
+
+@st.cache_resource
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Worker processes for PDF page scans, shared by all sessions."""
+    # spawn rather than fork: the Streamlit server process is multi-threaded
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+# Cached on the PDF bytes, so reruns (format switches, download clicks) skip
+# extraction. It runs on worker threads (see main), so instead of calling st.*
+# it returns its (level, message) notes for the script thread to render.
+@st.cache_data(max_entries=16, show_spinner=False)
+def extract_all(pdf_bytes: bytes, extract_tables: bool = True) -> Tuple[str, Optional[List[Dict[str, Any]]], List[Tuple[str, str]]]:
+    """Extract text and, if requested, tables from PDF in a single PyMuPDF pass."""
+    messages = []
+    
+    # One PyMuPDF (MuPDF's C parser) pass reads the text and finds the pages
+    # that draw any lines or shapes. pdfplumber's table finder builds cells
+    # from ruling lines, so only those pages are handed to it.
+    text = ""
+    table_pages = None  # None: scan failed, let pdfplumber try every page
     try:
-        # Try pdfplumber first (better for complex layouts)
-        with pdfplumber.open(pdf_file) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        if text.strip():
-            return text
+        # PyMuPDF holds the GIL and is not thread-safe, and extract_all runs
+        # on one thread per upload, so every fitz call (the page count too)
+        # happens in a worker process
+        pool = _get_process_pool()
+        n_pages = pool.submit(_page_count, pdf_bytes).result()
         
-        # Fallback to PyPDF2
-        pdf_file.seek(0)  # Reset file pointer
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
+        # Long PDFs are split into one contiguous page range per worker
+        if n_pages <= PARALLEL_MIN_PAGES:
+            step = max(n_pages, 1)
+        else:
+            step = -(-n_pages // (os.cpu_count() or 1))
+        futures = [
+            pool.submit(_scan_page_range, pdf_bytes, start, min(start + step, n_pages), extract_tables)
+            for start in range(0, n_pages, step)
+        ]
+        results = [future.result() for future in futures]
         
-        return text
+        page_texts = []
+        drawn_pages = []
+        for range_texts, range_drawn_pages in results:
+            page_texts.extend(range_texts)
+            drawn_pages.extend(range_drawn_pages)
+        text = "\n".join(page_texts)
+        table_pages = drawn_pages
     except Exception as e:
-        st.error(f"Error extracting text from PDF: {str(e)}")
-        return ""
+        messages.append(("error", f"Error extracting text from PDF: {str(e)}"))
+    
+    tables = None
+    if extract_tables:
+        tables = []
+        if table_pages != []:
+            try:
+                # pdfplumber is pure Python, so it runs in a worker process
+                # where uploads processed side by side don't share the GIL
+                future = _get_process_pool().submit(extract_tables_from_pdf, pdf_bytes, table_pages)
+                tables = future.result()
+            except Exception as e:
+                messages.append(("warning", f"Table extraction failed: {str(e)}"))
+    return text, tables, messages
 
-def extract_tables_from_pdf(pdf_file) -> List[pd.DataFrame]:
-    """Extract tables from PDF using pdfplumber."""
-    tables = []
-    try:
-        with pdfplumber.open(pdf_file) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                page_tables = page.extract_tables()
-                for table_num, table in enumerate(page_tables):
-                    if table:
-                        df = pd.DataFrame(table[1:], columns=table[0])
-                        df['Page'] = page_num + 1
-                        df['Table'] = table_num + 1
-                        tables.append(df)
-    except Exception as e:
-        st.warning(f"Table extraction failed: {str(e)}")
+@dataclass
+class TextStats:
+    """Extracted text split into lines and counted once, shared by the output formats."""
+    lines: List[str]
+    nonempty_lines: List[str]  # stripped
+    line_word_counts: List[int]  # per non-empty line
+    word_count: int
+    char_count: int
     
-    return tables
+    @classmethod
+    def from_text(cls, text: str) -> "TextStats":
+        # One pass over the lines strips and counts words for each; their sum
+        # equals len(text.split()) since '\n' is whitespace too
+        lines = text.split('\n')
+        nonempty_lines = []
+        line_word_counts = []
+        for line in lines:
+            stripped = line.strip()
+            if stripped:
+                nonempty_lines.append(stripped)
+                line_word_counts.append(len(stripped.split()))
+        return cls(
+            lines=lines,
+            nonempty_lines=nonempty_lines,
+            line_word_counts=line_word_counts,
+            word_count=sum(line_word_counts),
+            char_count=len(text)
+        )
+
+# Runs of whitespace other than line breaks, collapsed to a single space in
+# the markdown text section
+_WS_RE = re.compile(r'[^\S\n]+')
+
+# Line types for the markdown loop after the ALL CAPS header check, tried in
+# order by a single match: subheaders (under 80 characters ending in ':',
+# not URLs), bullets, short numbers and _italic_ lines
+_LINE_RE = re.compile(
+    r'(?P<subheader>(?!http).{0,78}:\Z)'
+    r'|(?P<bullet>[•*-])'
+    r'|(?P<number>\d{1,3}\Z)'
+    r'|(?P<italic>_(?:.*_)?\Z)'
+)
 
-def process_pdf_to_markdown(text: str, tables: Optional[List[pd.DataFrame]] = None) -> str:
+def process_pdf_to_markdown(stats: TextStats, tables: Optional[List[Dict[str, Any]]] = None) -> str:
     """Convert extracted text to markdown format with enhanced formatting and table support."""
-    if not text.strip() and not tables:
+    if not stats.nonempty_lines and not tables:
         return "# No text extracted from PDF"
     
-    markdown_parts = []
+    # The whole document, tables included, is written straight into one
+    # buffer, one '\n'-terminated line at a time
+    buffer = io.StringIO()
+    
+    def write(line=""):
+        buffer.write(line)
+        buffer.write('\n')
     
     # Process text with enhanced formatting
-    if text.strip():
-        lines = text.split('\n')
-        markdown_lines = []
+    if stats.nonempty_lines:
+        # Lines are built from stripped input, so only runs of spaces inside
+        # them need cleaning up; that is done for the whole section at once
+        text_buffer = io.StringIO()
         current_paragraph = []
         
-        for line in lines:
+        def write_line(line=""):
+            # An empty line adds spacing
+            text_buffer.write(line)
+            text_buffer.write('\n')
+        
+        def flush(spacing=True):
+            # Process accumulated paragraph
+            if current_paragraph:
+                write_line(' '.join(current_paragraph))
+                if spacing:
+                    write_line()
+                current_paragraph.clear()
+        
+        for line in stats.lines:
             line = line.strip()
             if not line:
-                # Process accumulated paragraph
-                if current_paragraph:
-                    paragraph_text = ' '.join(current_paragraph)
-                    if len(paragraph_text) > 0:
-                        markdown_lines.append(paragraph_text)
-                        markdown_lines.append("")  # Add spacing
-                    current_paragraph = []
+                flush()
                 continue
             
             # Enhanced header detection
-            if line.isupper() and len(line) > 3 and len(line) < 100:
-                # Process any accumulated paragraph first
-                if current_paragraph:
-                    paragraph_text = ' '.join(current_paragraph)
-                    if len(paragraph_text) > 0:
-                        markdown_lines.append(paragraph_text)
-                        markdown_lines.append("")
-                    current_paragraph = []
-                
+            if 3 < len(line) < 100 and line.isupper():
                 # Add header with better formatting
-                markdown_lines.append(f"## {line.title()}")
-                markdown_lines.append("")
-                
-            elif line.endswith(':') and len(line) < 80 and not line.startswith('http'):
-                # Process any accumulated paragraph first
-                if current_paragraph:
-                    paragraph_text = ' '.join(current_paragraph)
-                    if len(paragraph_text) > 0:
-                        markdown_lines.append(paragraph_text)
-                        markdown_lines.append("")
-                    current_paragraph = []
-                
+                flush()
+                write_line(f"## {line.title()}")
+                write_line()
+                continue
+            
+            match = _LINE_RE.match(line)
+            line_type = match.lastgroup if match else None
+            if line_type == 'subheader':
                 # Add subheader
-                markdown_lines.append(f"### {line}")
-                markdown_lines.append("")
-                
-            elif line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                # Process any accumulated paragraph first
-                if current_paragraph:
-                    paragraph_text = ' '.join(current_paragraph)
-                    if len(paragraph_text) > 0:
-                        markdown_lines.append(paragraph_text)
-                        markdown_lines.append("")
-                    current_paragraph = []
+                flush()
+                write_line(f"### {line}")
+                write_line()
                 
+            elif line_type == 'bullet':
                 # Add bullet point
-                markdown_lines.append(f"- {line[1:].strip()}")
-                
-            elif line.isdigit() and len(line) <= 3:
-                # Process any accumulated paragraph first
-                if current_paragraph:
-                    paragraph_text = ' '.join(current_paragraph)
-                    if len(paragraph_text) > 0:
-                        markdown_lines.append(paragraph_text)
-                        markdown_lines.append("")
-                    current_paragraph = []
+                flush()
+                write_line(f"- {line[1:].strip()}".rstrip())
                 
+            elif line_type == 'number':
                 # Add numbered list item
-                markdown_lines.append(f"{line}.")
-                
-            elif line.startswith('**') and line.endswith('**'):
-                # Process any accumulated paragraph first
-                if current_paragraph:
-                    paragraph_text = ' '.join(current_paragraph)
-                    if len(paragraph_text) > 0:
-                        markdown_lines.append(paragraph_text)
-                        markdown_lines.append("")
-                    current_paragraph = []
-                
-                # Add bold text as emphasis
-                markdown_lines.append(f"**{line[2:-2]}**")
-                
-            elif line.startswith('_') and line.endswith('_'):
-                # Process any accumulated paragraph first
-                if current_paragraph:
-                    paragraph_text = ' '.join(current_paragraph)
-                    if len(paragraph_text) > 0:
-                        markdown_lines.append(paragraph_text)
-                        markdown_lines.append("")
-                    current_paragraph = []
+                flush()
+                write_line(f"{line}.")
                 
+            elif line_type == 'italic':
                 # Add italic text
-                markdown_lines.append(f"*{line[1:-1]}*")
+                flush()
+                write_line(f"*{line[1:-1]}*")
                 
             else:
                 # Add to current paragraph
                 current_paragraph.append(line)
         
         # Process any remaining paragraph
-        if current_paragraph:
-            paragraph_text = ' '.join(current_paragraph)
-            if len(paragraph_text) > 0:
-                markdown_lines.append(paragraph_text)
-        
-        # Clean up and format
-        formatted_lines = []
-        for line in markdown_lines:
-            if line.strip():
-                # Clean up extra spaces
-                cleaned_line = ' '.join(line.split())
-                formatted_lines.append(cleaned_line)
-            else:
-                formatted_lines.append("")
+        flush(spacing=False)
         
-        markdown_parts.append('\n'.join(formatted_lines))
+        # Clean up extra spaces
+        buffer.write(_WS_RE.sub(' ', text_buffer.getvalue()))
     
     # Process tables with enhanced formatting
     if tables:
-        markdown_parts.append("\n---")
-        markdown_parts.append("\n## 📊 Tables")
-        markdown_parts.append("")
+        write("\n---")
+        write("\n## 📊 Tables")
+        write()
         
         for i, table in enumerate(tables):
-            markdown_parts.append(f"### Table {i+1} (Page {table['Page'].iloc[0]})")
-            markdown_parts.append("")
-            
-            # Create enhanced table with better formatting
-            table_df = table.drop(['Page', 'Table'], axis=1)
+            write(f"### Table {i+1} (Page {table['page']})")
+            write()
             
             # Add table header
-            headers = list(table_df.columns)
-            markdown_parts.append("| " + " | ".join(headers) + " |")
-            markdown_parts.append("| " + " | ".join(["---"] * len(headers)) + " |")
+            headers = table['header']
+            write("| " + " | ".join(map(_cell_text, headers)) + " |")
+            write("| " + " | ".join(["---"] * len(headers)) + " |")
             
             # Add table rows
-            for _, row in table_df.iterrows():
-                row_values = [str(val) if pd.notna(val) else "" for val in row.values]
-                markdown_parts.append("| " + " | ".join(row_values) + " |")
+            buffer.writelines(
+                "| " + " | ".join(map(_cell_text, row)) + " |\n" for row in table['rows']
+            )
             
-            markdown_parts.append("")
-            markdown_parts.append(f"*Table {i+1} contains {len(table_df)} rows and {len(headers)} columns*")
-            markdown_parts.append("")
+            write()
+            write(f"*Table {i+1} contains {len(table['rows'])} rows and {len(headers)} columns*")
+            write()
     
     # Add document summary
-    if text.strip():
-        word_count = len(text.split())
-        char_count = len(text)
-        line_count = len([line for line in text.split('\n') if line.strip()])
-        
-        markdown_parts.append("---")
-        markdown_parts.append("## 📋 Document Summary")
-        markdown_parts.append("")
-        markdown_parts.append(f"- **Word Count**: {word_count:,}")
-        markdown_parts.append(f"- **Character Count**: {char_count:,}")
-        markdown_parts.append(f"- **Line Count**: {line_count:,}")
+    if stats.nonempty_lines:
+        write("---")
+        write("## 📋 Document Summary")
+        write()
+        write(f"- **Word Count**: {stats.word_count:,}")
+        write(f"- **Character Count**: {stats.char_count:,}")
+        write(f"- **Line Count**: {len(stats.nonempty_lines):,}")
         if tables:
-            markdown_parts.append(f"- **Tables Found**: {len(tables)}")
+            write(f"- **Tables Found**: {len(tables)}")
     
-    return '\n'.join(markdown_parts)
+    # Drop the newline after the last line
+    return buffer.getvalue()[:-1]
 
-def process_pdf_to_json(text: str, filename: str, tables: Optional[List[pd.DataFrame]] = None) -> Dict[str, Any]:
+def process_pdf_to_json(stats: TextStats, filename: str, tables: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
     """Convert extracted text to JSON format with table support."""
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    lines = stats.nonempty_lines
     
     result = {
         "filename": filename,
         "total_lines": len(lines),
         "content": lines,
         "summary": {
-            "word_count": len(text.split()),
-            "character_count": len(text),
+            "word_count": stats.word_count,
+            "character_count": stats.char_count,
             "line_count": len(lines),
             "table_count": len(tables) if tables else 0
         }
@@ -320,68 +397,137 @@ def process_pdf_to_json(text: str, filename: str, tables: Optional[List[pd.DataF
         for i, table in enumerate(tables):
             table_data = {
                 "table_number": i + 1,
-                "page": int(table['Page'].iloc[0]),
-                "rows": len(table),
-                "columns": len(table.columns) - 2,  # Exclude Page and Table columns
-                "data": table.drop(['Page', 'Table'], axis=1).to_dict('records')
+                "page": table['page'],
+                "rows": len(table['rows']),
+                "columns": len(table['header']),
+                "data": [dict(zip(table['header'], row)) for row in table['rows']]
             }
             result["tables"].append(table_data)
     
     return result
 
-def process_pdf_to_csv(text: str, tables: Optional[List[pd.DataFrame]] = None) -> Dict[str, pd.DataFrame]:
+def process_pdf_to_csv(stats: TextStats, tables: Optional[List[Dict[str, Any]]] = None) -> Dict[str, pd.DataFrame]:
     """Convert extracted text to CSV format with table support."""
     result = {}
     
     # Text content
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    lines = stats.nonempty_lines
     if lines:
         text_df = pd.DataFrame({
-            'Line_Number': range(1, len(lines) + 1),
+            'Line_Number': np.arange(1, len(lines) + 1, dtype=np.int32),
             'Content': lines,
-            'Word_Count': [len(line.split()) for line in lines],
-            'Character_Count': [len(line) for line in lines]
+            'Word_Count': np.array(stats.line_word_counts, dtype=np.int32),
+            'Character_Count': np.fromiter(map(len, lines), dtype=np.int32, count=len(lines))
         })
         result['text_content'] = text_df
     
     # Tables
     if tables:
         for i, table in enumerate(tables):
-            result[f'table_{i+1}'] = table
+            result[f'table_{i+1}'] = table_to_dataframe(table)
     
     return result
 
-def get_download_link(data, filename: str, file_type: str):
-    """Generate download link for files."""
-    if file_type == "csv":
-        if isinstance(data, dict):
-            # Multiple CSV files (text + tables)
-            csv_data = data.get('text_content', pd.DataFrame())
-            if not csv_data.empty:
-                csv = csv_data.to_csv(index=False)
-                b64 = base64.b64encode(csv.encode()).decode()
-                href = f'<a href="data:file/csv;base64,{b64}" download="{filename}_text.csv">Download Text CSV</a>'
-                
-                # Add table downloads
-                for key, table_df in data.items():
-                    if key != 'text_content' and isinstance(table_df, pd.DataFrame):
-                        csv = table_df.to_csv(index=False)
-                        b64 = base64.b64encode(csv.encode()).decode()
-                        href += f'<br><a href="data:file/csv;base64,{b64}" download="{filename}_{key}.csv">Download {key.replace("_", " ").title()} CSV</a>'
-                return href
-        else:
-            csv = data.to_csv(index=False)
-            b64 = base64.b64encode(csv.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">Download CSV file</a>'
-    elif file_type == "json":
-        json_str = json.dumps(data, indent=2, ensure_ascii=False)
-        b64 = base64.b64encode(json_str.encode()).decode()
-        href = f'<a href="data:file/json;base64,{b64}" download="{filename}.json">Download JSON file</a>'
-    elif file_type == "markdown":
-        b64 = base64.b64encode(data.encode()).decode()
-        href = f'<a href="data:file/markdown;base64,{b64}" download="{filename}.md">Download Markdown file</a>'
+def dump_json(data) -> bytes:
+    """Serialize data as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        # Table headers may be None, which OPT_NON_STR_KEYS writes as "null"
+        # just like json.dumps
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode()
+
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    """Write a DataFrame as CSV straight into a bytes buffer for st.download_button."""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_markdown_html(markdown_text: str) -> str:
+    """Render markdown to HTML once per document; the tables extension turns pipe tables into <table>."""
+    return markdown.markdown(markdown_text, extensions=['tables'])
+
+def render_result(filename: str, text: str, tables: Optional[List[Dict[str, Any]]],
+                  messages: List[Tuple[str, str]], output_format: str, file_index: int):
+    """Show the notes, preview and download buttons for one processed PDF."""
+    for level, message in messages:
+        getattr(st, level)(message)
+    if tables:
+        st.success(f"Found {len(tables)} table(s)")
     
-    return href
+    # Split and count the text once for whichever format is rendered
+    stats = TextStats.from_text(text)
+    if stats.nonempty_lines or tables:
+        # Process based on selected format
+        if output_format == "Markdown":
+            processed_data = process_pdf_to_markdown(stats, tables)
+            
+            # Create tabs for different views
+            tab1, tab2 = st.tabs(["📄 Rendered Preview", "📝 Raw Markdown"])
+            
+            with tab1:
+                # Rendered markdown with custom styling
+                st.markdown(f"""
+                <div class="markdown-text-container">
+                {render_markdown_html(processed_data)}
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with tab2:
+                # Raw markdown text
+                st.text_area("Raw Markdown:", processed_data, height=400)
+            
+            # Download button
+            st.download_button(
+                "Download Markdown file",
+                processed_data.encode('utf-8'),
+                file_name=f"{filename.replace('.pdf', '')}.md",
+                mime="text/markdown",
+                key=f"download_{file_index}"
+            )
+            
+        elif output_format == "JSON":
+            processed_data = process_pdf_to_json(stats, filename, tables)
+            st.json(processed_data)
+            
+            # Download button
+            st.download_button(
+                "Download JSON file",
+                dump_json(processed_data),
+                file_name=f"{filename.replace('.pdf', '')}.json",
+                mime="application/json",
+                key=f"download_{file_index}"
+            )
+            
+        elif output_format == "CSV":
+            processed_data = process_pdf_to_csv(stats, tables)
+            
+            # Display text content
+            if 'text_content' in processed_data:
+                st.subheader("Text Content")
+                st.dataframe(processed_data['text_content'])
+            
+            # Display tables
+            for key, table_df in processed_data.items():
+                if key != 'text_content':
+                    st.subheader(f"Table {key.replace('_', ' ').title()}")
+                    st.dataframe(table_df)
+            
+            # Download buttons, one CSV per text/table frame
+            base_name = filename.replace('.pdf', '')
+            with st.expander(f"Download CSV files ({len(processed_data)})", expanded=True):
+                for key, df in processed_data.items():
+                    label = "Text" if key == 'text_content' else key.replace('_', ' ').title()
+                    suffix = "text" if key == 'text_content' else key
+                    st.download_button(
+                        f"Download {label} CSV",
+                        csv_bytes(df),
+                        file_name=f"{base_name}_{suffix}.csv",
+                        mime="text/csv",
+                        key=f"download_{file_index}_{key}"
+                    )
+    else:
+        st.error("No text or tables could be extracted from this PDF.")
 
 def main():
     st.title("📄 PDF to Markdown/JSON/CSV Converter")
@@ -411,87 +557,40 @@ def main():
                 help="Choose the format you want to download"
             )
         
-        # Process button
+        # Process button; results stay on screen across reruns (format
+        # switches, download clicks) until the set of uploads changes, and
+        # the cached extraction makes those reruns cheap
+        upload_key = [(f.name, f.size) for f in uploaded_files]
         if st.button("Process PDF(s)", type="primary"):
+            st.session_state.processed_uploads = upload_key
+        
+        if st.session_state.get("processed_uploads") == upload_key:
+            # The styles only apply to the rendered markdown preview, so the
+            # block is sent once per run and only when that preview is shown
+            if output_format == "Markdown":
+                st.markdown(MARKDOWN_CSS, unsafe_allow_html=True)
+            
+            # One container per file keeps the upload order on screen while
+            # results are filled in as soon as each file finishes
+            containers = []
+            for uploaded_file in uploaded_files:
+                container = st.container()
+                container.subheader(f"Processing: {uploaded_file.name}")
+                containers.append(container)
+                st.divider()
+            
             with st.spinner("Processing PDF(s)..."):
-                for uploaded_file in uploaded_files:
-                    st.subheader(f"Processing: {uploaded_file.name}")
-                    
-                    # Extract text from PDF
-                    text = extract_text_from_pdf(uploaded_file)
-                    
-                    # Extract tables if requested
-                    tables = None
-                    if extract_tables:
-                        tables = extract_tables_from_pdf(uploaded_file)
-                        if tables:
-                            st.success(f"Found {len(tables)} table(s)")
-                    
-                    if text.strip() or tables:
-                        # Process based on selected format
-                        if output_format == "Markdown":
-                            processed_data = process_pdf_to_markdown(text, tables)
-                            
-                            # Create tabs for different views
-                            tab1, tab2 = st.tabs(["📄 Rendered Preview", "📝 Raw Markdown"])
-                            
-                            with tab1:
-                                # Rendered markdown with custom styling
-                                st.markdown(f"""
-                                <div class="markdown-text-container">
-                                {markdown.markdown(processed_data)}
-                                </div>
-                                """, unsafe_allow_html=True)
-                            
-                            with tab2:
-                                # Raw markdown text
-                                st.text_area("Raw Markdown:", processed_data, height=400)
-                            
-                            # Download link
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "markdown"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                            
-                        elif output_format == "JSON":
-                            processed_data = process_pdf_to_json(text, uploaded_file.name, tables)
-                            st.json(processed_data)
-                            
-                            # Download link
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "json"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                            
-                        elif output_format == "CSV":
-                            processed_data = process_pdf_to_csv(text, tables)
-                            
-                            # Display text content
-                            if 'text_content' in processed_data:
-                                st.subheader("Text Content")
-                                st.dataframe(processed_data['text_content'])
-                            
-                            # Display tables
-                            for key, table_df in processed_data.items():
-                                if key != 'text_content':
-                                    st.subheader(f"Table {key.replace('_', ' ').title()}")
-                                    st.dataframe(table_df)
-                            
-                            # Download links
-                            download_link = get_download_link(
-                                processed_data, 
-                                uploaded_file.name.replace('.pdf', ''), 
-                                "csv"
-                            )
-                            st.markdown(download_link, unsafe_allow_html=True)
-                    else:
-                        st.error("No text or tables could be extracted from this PDF.")
-                    
-                    st.divider()
+                max_workers = min(len(uploaded_files), os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(extract_all, uploaded_file.getvalue(), extract_tables): file_index
+                        for file_index, uploaded_file in enumerate(uploaded_files)
+                    }
+                    # Streamlit elements must be created on the script thread
+                    for future in as_completed(futures):
+                        file_index = futures[future]
+                        with containers[file_index]:
+                            render_result(uploaded_files[file_index].name, *future.result(), output_format, file_index)
     else:
         st.info("👆 Please upload PDF file(s) to get started!")
         
@@ -501,7 +600,7 @@ def main():
             1. **Upload PDF(s)**: Click the upload button and select one or more PDF files
             2. **Choose Options**: Select whether to extract tables and your desired output format
             3. **Process**: Click the 'Process PDF(s)' button
-            4. **Download**: Use the download links to save your converted files
+            4. **Download**: Use the download buttons to save your converted files
             
             **Features:**
             - **Table Extraction**: Automatically detect and extract tables from PDFs
@@ -5,16 +5,26 @@ Process multiple PDFs efficiently with progress tracking and organized output.
 """
 
 import os
+import io
+import gc
 import sys
+import csv
 import json
-import pandas as pd
+import hashlib
 import time
 from pathlib import Path
 from datetime import datetime
 import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 import logging
 
+# orjson is optional; it serializes the summaries much faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,29 +35,64 @@ logging.basicConfig(
     ]
 )
 
-def extract_with_camelot(pdf_path):
-    """Extract tables using Camelot."""
+# Lattice tables at least this accurate and with less whitespace than this
+# (Camelot parsing_report percentages) make the Stream pass unnecessary
+LATTICE_MIN_ACCURACY = 80
+LATTICE_MAX_WHITESPACE = 50
+
+# Camelot keeps every rendered page image alive for the whole read_pdf call,
+# so long PDFs are read in page chunks to bound peak memory
+CAMELOT_CHUNK_PAGES = int(os.environ.get("CAMELOT_CHUNK_PAGES", 50))
+
+def _page_count(pdf_path, pdf_bytes=None):
+    """Return the number of pages in the PDF"""
+    from PyPDF2 import PdfReader
+    source = io.BytesIO(pdf_bytes) if pdf_bytes is not None else pdf_path
+    return len(PdfReader(source).pages)
+
+def _read_camelot_flavor(camelot, pdf_path, n_pages, flavor):
+    """Run one Camelot flavor chunk by chunk, returning (DataFrame, parsing_report) pairs or [] if it fails."""
+    try:
+        results = []
+        for start in range(1, n_pages + 1, CAMELOT_CHUNK_PAGES):
+            stop = min(start + CAMELOT_CHUNK_PAGES - 1, n_pages)
+            tables = camelot.read_pdf(pdf_path, pages=f"{start}-{stop}", flavor=flavor)
+            results.extend((table.df, table.parsing_report) for table in tables)
+            # Release the Table objects (and their page images) before the next chunk
+            del tables
+            gc.collect()
+        logging.info(f"  {flavor.title()} method found {len(results)} tables")
+        return results
+    except Exception as e:
+        logging.warning(f"  {flavor.title()} method failed: {e}")
+        return []
+
+def extract_with_camelot(pdf_path, pdf_bytes=None, n_pages=None):
+    """Extract tables using Camelot, returning their DataFrames."""
     try:
         import camelot.io as camelot
         logging.info(f"Trying Camelot on {Path(pdf_path).name}...")
         
-        tables = []
+        if n_pages is None:
+            n_pages = _page_count(pdf_path, pdf_bytes)
         
         # Method 1: Lattice (for tables with borders)
-        try:
-            lattice_tables = camelot.read_pdf(pdf_path, pages='all', flavor='lattice')
-            tables.extend(lattice_tables)
-            logging.info(f"  Lattice method found {len(lattice_tables)} tables")
-        except Exception as e:
-            logging.warning(f"  Lattice method failed: {e}")
+        lattice_tables = _read_camelot_flavor(camelot, pdf_path, n_pages, 'lattice')
         
-        # Method 2: Stream (for tables without borders)
-        try:
-            stream_tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
-            tables.extend(stream_tables)
-            logging.info(f"  Stream method found {len(stream_tables)} tables")
-        except Exception as e:
-            logging.warning(f"  Stream method failed: {e}")
+        # Stream would mostly re-find bordered tables as duplicates or
+        # fragments, so it is skipped when Lattice parsed tables confidently
+        good_tables = [
+            (df, report) for df, report in lattice_tables
+            if report.get("accuracy", 0) >= LATTICE_MIN_ACCURACY
+            and report.get("whitespace", 100) < LATTICE_MAX_WHITESPACE
+        ]
+        if good_tables:
+            logging.info(f"  Skipping Stream method: {len(good_tables)} confident Lattice tables")
+            tables = [df for df, _ in good_tables]
+        else:
+            # Method 2: Stream (for tables without borders)
+            stream_tables = _read_camelot_flavor(camelot, pdf_path, n_pages, 'stream')
+            tables = [df for df, _ in lattice_tables + stream_tables]
         
         if tables:
             logging.info(f"  Total Camelot tables: {len(tables)}")
@@ -63,69 +108,304 @@ def extract_with_camelot(pdf_path):
         logging.error(f"Camelot error: {e}")
         return []
 
-def extract_with_pdfplumber(pdf_path):
-    """Extract tables and text using pdfplumber."""
+class TextFileWriter:
+    """Write page texts to a file as they are extracted, counting characters and words as it goes.
+    
+    Pages are separated by a newline and empty pages are skipped; the file is
+    only created once there is some text.
+    """
+    
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+        self.text_length = 0
+        self.word_count = 0
+    
+    def write(self, text):
+        if not text:
+            return
+        if self.file is None:
+            self.file = open(self.filename, 'w', encoding='utf-8')
+        else:
+            self.file.write('\n')
+            self.text_length += 1
+        self.file.write(text)
+        self.text_length += len(text)
+        # Words never span pages, so per-page counts add up to the whole
+        self.word_count += len(text.split())
+    
+    def discard(self):
+        """Drop whatever was written so far."""
+        self.close()
+        Path(self.filename).unlink(missing_ok=True)
+        self.text_length = 0
+        self.word_count = 0
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def scan_with_pymupdf(pdf_path, text_writer, pdf_bytes=None):
+    """Write the text and return the drawn-on pages and page count using PyMuPDF; return None if it is unavailable or fails."""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        logging.warning("PyMuPDF not available, using pdfplumber for text")
+        return None
+    try:
+        if pdf_bytes is not None:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        else:
+            doc = fitz.open(pdf_path)
+        drawn_pages = []
+        with doc:
+            for page_num, page in enumerate(doc, 1):
+                text_writer.write(page.get_text("text"))
+                if page.get_drawings():
+                    drawn_pages.append(page_num)
+            return drawn_pages, doc.page_count
+    except Exception as e:
+        logging.error(f"PyMuPDF error: {e}")
+        text_writer.discard()
+        return None
+
+def extract_with_pdfplumber(pdf_path, pdf_bytes=None, text_writer=None, pages=None):
+    """Extract tables and the number of pages read (None on failure) using pdfplumber, writing the text to text_writer if given.
+    
+    Reads pdf_bytes if given (already read from pdf_path), and only the given 1-based pages if any.
+    """
     try:
         import pdfplumber
         logging.info(f"Trying pdfplumber on {Path(pdf_path).name}...")
         
         tables = []
-        all_text = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
+        source = io.BytesIO(pdf_bytes) if pdf_bytes is not None else pdf_path
+        with pdfplumber.open(source, pages=pages) as pdf:
+            n_pages = len(pdf.pages)
+            for page in pdf.pages:
                 # Extract tables
                 page_tables = page.extract_tables()
                 if page_tables:
                     for table_num, table in enumerate(page_tables):
-                        if table and any(any(cell for cell in row) for row in table):
+                        # any(row) tests the cells at C speed and stops at
+                        # the first non-empty one
+                        if table and any(map(any, table)):
                             tables.append({
-                                'page': page_num + 1,
+                                'page': page.page_number,
                                 'table_num': table_num + 1,
                                 'data': table
                             })
                 
-                # Extract text
-                text = page.extract_text()
-                if text:
-                    all_text.append(text)
+                # Extract text. extract_text_simple() clusters the page's
+                # chars (already parsed for the table finder) straight into
+                # lines and skips extract_text()'s word-level layout pass.
+                if text_writer is not None:
+                    text_writer.write(page.extract_text_simple(x_tolerance=3, y_tolerance=3))
+                
+                # Only the extracted rows are kept; drop the page's parsed
+                # layout objects before the next page
+                page.close()
         
         logging.info(f"  pdfplumber found {len(tables)} tables")
-        return tables, '\n'.join(all_text)
+        return tables, n_pages
         
     except ImportError:
         logging.error("pdfplumber not available")
-        return [], ""
+        return [], None
     except Exception as e:
         logging.error(f"pdfplumber error: {e}")
-        return [], ""
+        return [], None
 
-def process_single_pdf(pdf_path, output_dir):
-    """Process a single PDF and save results."""
-    pdf_name = Path(pdf_path).stem
-    pdf_dir = output_dir / pdf_name
+def extract_single_pdf(pdf_path, output_dir):
+    """Extract tables and text from a single PDF, writing only the text (to extracted_text.txt)."""
+    pdf_path = Path(pdf_path)
+    logging.info(f"Processing: {pdf_path.name}")
+    start_time = time.time()
+    
+    # Read the file once; pdfplumber parses it from memory. Camelot needs a
+    # path, as it splits the PDF into per-page files of its own.
+    pdf_bytes = pdf_path.read_bytes()
+    
+    # The text goes to disk page by page as it is extracted, instead of
+    # being joined in memory and sent back from the worker process
+    pdf_dir = Path(output_dir) / pdf_path.stem
+    pdf_dir.mkdir(exist_ok=True)
+    with TextFileWriter(pdf_dir / "extracted_text.txt") as text_writer:
+        # Extract text with PyMuPDF (MuPDF's C parser), much faster than
+        # pdfplumber's pure-Python pdfminer. The same pass finds the pages
+        # that draw any lines, rects or curves: pdfplumber's default "lines"
+        # table strategy builds cells from those edges, so it only needs to
+        # parse those pages. The page count it reads is what Camelot's page
+        # chunks need, so the PDF isn't parsed again just to count pages.
+        scan = scan_with_pymupdf(pdf_path, text_writer, pdf_bytes)
+        if scan is not None:
+            table_pages, n_pages = scan
+            pdfplumber_tables = []
+            if table_pages:
+                pdfplumber_tables, _ = extract_with_pdfplumber(pdf_path, pdf_bytes, pages=table_pages)
+        else:
+            # Without PyMuPDF, pdfplumber reads every page for text and tables
+            pdfplumber_tables, n_pages = extract_with_pdfplumber(pdf_path, pdf_bytes, text_writer)
+    
+    # Extract with Camelot
+    camelot_tables = extract_with_camelot(str(pdf_path), pdf_bytes, n_pages)
+    
+    # Only plain lists and counts are returned, so handing the result back
+    # from a worker process is cheap
+    return {
+        "pdf_path": str(pdf_path),
+        "camelot_tables": [df.values.tolist() for df in camelot_tables],
+        "pdfplumber_tables": pdfplumber_tables,
+        "text_length": text_writer.text_length,
+        "word_count": text_writer.word_count,
+        "extraction_time": time.time() - start_time
+    }
+
+def write_json(filename, data):
+    """Write data as indented JSON, using orjson when available."""
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
+
+def json_line(data):
+    """Serialize data as one line of NDJSON (bytes, newline-terminated)."""
+    if orjson is not None:
+        return orjson.dumps(data) + b"\n"
+    return json.dumps(data).encode() + b"\n"
+
+def read_json(filename):
+    """Return the data of a JSON file."""
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(filename, 'rb') as f:
+        return loads(f.read())
+
+def iter_json_lines(filename):
+    """Yield the records of an NDJSON file one at a time."""
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(filename, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+def write_batch_summary(filename, batch_summary, results_log_file):
+    """Write the batch summary JSON, copying its file_results from the NDJSON log line by line."""
+    # The other summary values are scalars; the per-file records are
+    # already serialized in the log, one per line, and are never loaded
+    # together
+    with open(filename, 'wb') as f:
+        f.write(b"{\n")
+        for key, value in batch_summary.items():
+            f.write(b"  " + json_line(key).rstrip() + b": " + json_line(value).rstrip() + b",\n")
+        f.write(b'  "file_results": [')
+        separator = b"\n    "
+        with open(results_log_file, 'rb') as results_log:
+            for line in results_log:
+                if line.strip():
+                    f.write(separator + line.rstrip())
+                    separator = b",\n    "
+        f.write(b"\n  ]\n}\n" if separator != b"\n    " else b"]\n}\n")
+
+def write_summary_csv(filename, results_log_file):
+    """Write the successful results of the NDJSON log as CSV; return False if there are none."""
+    # Two streaming passes: the first collects the columns (in order of
+    # appearance, since summaries from earlier runs may lack newer fields),
+    # the second writes the rows
+    fieldnames = {}
+    for result in iter_json_lines(results_log_file):
+        if result.get("status") == "success":
+            fieldnames.update(dict.fromkeys(result))
+    if not fieldnames:
+        return False
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(fieldnames), restval="")
+        writer.writeheader()
+        writer.writerows(
+            result for result in iter_json_lines(results_log_file)
+            if result.get("status") == "success"
+        )
+    return True
+
+def save_error(pdf_path, output_dir, error):
+    """Log a failed PDF, write its error.json and return the error summary."""
+    pdf_path = Path(pdf_path)
+    logging.error(f"Error processing {pdf_path.name}: {error}")
+    pdf_dir = Path(output_dir) / pdf_path.stem
+    pdf_dir.mkdir(exist_ok=True)
+    error_summary = {
+        "filename": pdf_path.name,
+        "status": "error",
+        "error": str(error)
+    }
+    error_filename = pdf_dir / "error.json"
+    write_json(error_filename, error_summary)
+    return error_summary
+
+def write_table_csv(filename, rows):
+    """Write a table's rows to CSV without going through pandas; return False if the table is empty."""
+    n_columns = max(map(len, rows), default=0)
+    if not n_columns:
+        return False
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        # Same layout as DataFrame(rows).to_csv(index=False): a header of
+        # column numbers, short rows padded and None written as ''
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(range(n_columns))
+        writer.writerows(
+            row if len(row) == n_columns else list(row) + [None] * (n_columns - len(row))
+            for row in rows
+        )
+    return True
+
+def table_digest(rows):
+    """Hash a table's normalized cell text, so the same table found by different methods can be recognized."""
+    return hashlib.blake2b(
+        b"\x1f".join(
+            b"\x1e".join(("" if cell is None else str(cell).strip()).encode() for cell in row)
+            for row in rows
+        ),
+        digest_size=16
+    ).digest()
+
+def persist_results(result, output_dir):
+    """Save the tables and summary of an extracted PDF (its text is already written)."""
+    pdf_path = Path(result["pdf_path"])
+    pdf_dir = Path(output_dir) / pdf_path.stem
     
     # Create directory for this PDF
     pdf_dir.mkdir(exist_ok=True)
     
     try:
-        logging.info(f"Processing: {Path(pdf_path).name}")
         start_time = time.time()
+        camelot_tables = result["camelot_tables"]
+        pdfplumber_tables = result["pdfplumber_tables"]
         
-        # Extract with Camelot
-        camelot_tables = extract_with_camelot(pdf_path)
-        
-        # Extract with pdfplumber
-        pdfplumber_tables, pdfplumber_text = extract_with_pdfplumber(pdf_path)
+        # A table already saved (e.g. found by both Camelot and pdfplumber)
+        # is not written again
+        seen_tables = set()
+        duplicates_skipped = 0
         
         # Save Camelot tables
         camelot_saved = 0
         for i, table in enumerate(camelot_tables):
             try:
-                df = table.df
-                if not df.empty:
-                    filename = pdf_dir / f"camelot_table_{i+1}.csv"
-                    df.to_csv(filename, index=False)
+                digest = table_digest(table)
+                if digest in seen_tables:
+                    duplicates_skipped += 1
+                    continue
+                filename = pdf_dir / f"camelot_table_{i+1}.csv"
+                if write_table_csv(filename, table):
+                    seen_tables.add(digest)
                     camelot_saved += 1
             except Exception as e:
                 logging.error(f"Error saving Camelot table {i+1}: {e}")
@@ -134,57 +414,81 @@ def process_single_pdf(pdf_path, output_dir):
         pdfplumber_saved = 0
         for i, table_info in enumerate(pdfplumber_tables):
             try:
-                df = pd.DataFrame(table_info['data'])
-                if not df.empty:
-                    filename = pdf_dir / f"pdfplumber_table_{i+1}.csv"
-                    df.to_csv(filename, index=False)
+                digest = table_digest(table_info['data'])
+                if digest in seen_tables:
+                    duplicates_skipped += 1
+                    continue
+                filename = pdf_dir / f"pdfplumber_table_{i+1}.csv"
+                if write_table_csv(filename, table_info['data']):
+                    seen_tables.add(digest)
                     pdfplumber_saved += 1
             except Exception as e:
                 logging.error(f"Error saving pdfplumber table {i+1}: {e}")
         
-        # Save text
-        text_filename = pdf_dir / "extracted_text.txt"
-        if pdfplumber_text:
-            with open(text_filename, 'w', encoding='utf-8') as f:
-                f.write(pdfplumber_text)
-        
         # Create summary
-        processing_time = time.time() - start_time
+        processing_time = result["extraction_time"] + time.time() - start_time
         summary = {
-            "filename": Path(pdf_path).name,
+            "filename": pdf_path.name,
             "processing_time_seconds": round(processing_time, 2),
             "camelot_tables_found": len(camelot_tables),
             "camelot_tables_saved": camelot_saved,
             "pdfplumber_tables_found": len(pdfplumber_tables),
             "pdfplumber_tables_saved": pdfplumber_saved,
-            "text_length": len(pdfplumber_text),
-            "word_count": len(pdfplumber_text.split()) if pdfplumber_text else 0,
+            "duplicate_tables_skipped": duplicates_skipped,
+            "text_length": result["text_length"],
+            "word_count": result["word_count"],
             "total_tables": len(camelot_tables) + len(pdfplumber_tables),
             "status": "success"
         }
         
         # Save summary
         summary_filename = pdf_dir / "summary.json"
-        with open(summary_filename, 'w') as f:
-            json.dump(summary, f, indent=2)
+        write_json(summary_filename, summary)
         
-        logging.info(f"Completed {Path(pdf_path).name} in {processing_time:.2f}s - {summary['total_tables']} tables found")
+        logging.info(f"Completed {pdf_path.name} in {processing_time:.2f}s - {summary['total_tables']} tables found")
         return summary
         
     except Exception as e:
-        logging.error(f"Error processing {Path(pdf_path).name}: {e}")
-        error_summary = {
-            "filename": Path(pdf_path).name,
-            "status": "error",
-            "error": str(e)
-        }
-        error_filename = pdf_dir / "error.json"
-        with open(error_filename, 'w') as f:
-            json.dump(error_summary, f, indent=2)
-        return error_summary
+        return save_error(pdf_path, output_dir, e)
 
-def process_pdfs_batch(input_dir, output_dir, max_workers=4):
-    """Process multiple PDFs with parallel processing."""
+def process_single_pdf(pdf_path, output_dir):
+    """Process a single PDF and save results."""
+    try:
+        result = extract_single_pdf(pdf_path, output_dir)
+    except Exception as e:
+        return save_error(pdf_path, output_dir, e)
+    return persist_results(result, output_dir)
+
+def _scan_pdf_entries(input_dir):
+    """Return the os.DirEntry of each PDF file (any case of .pdf) directly inside input_dir."""
+    # os.scandir reads the directory in one pass and the DirEntry answers
+    # is_file() from that listing, without a stat() per entry on most systems
+    with os.scandir(input_dir) as entries:
+        pdf_entries = sorted(
+            (entry for entry in entries if entry.name.lower().endswith(".pdf") and entry.is_file()),
+            key=lambda entry: entry.name
+        )
+    
+    # Each PDF's results go to a folder named after its stem, so files like
+    # report.pdf and report.PDF (or Report.pdf, on case-insensitive file
+    # systems) would overwrite each other; only the first one is kept
+    found = {}
+    for entry in pdf_entries:
+        stem = Path(entry.name).stem
+        key = stem.casefold()
+        if key in found:
+            logging.warning(f"Skipping {entry.name}: its output folder '{stem}' "
+                            f"is already used by {found[key].name}")
+        else:
+            found[key] = entry
+    return list(found.values())
+
+def find_pdf_files(input_dir):
+    """Return the PDF files (any case of .pdf) directly inside input_dir."""
+    return [Path(entry.path) for entry in _scan_pdf_entries(input_dir)]
+
+def process_pdfs_batch(input_dir, output_dir, max_workers=4, force=False):
+    """Process multiple PDFs with parallel processing, skipping those already processed unless force is set."""
     input_path = Path(input_dir)
     output_path = Path(output_dir)
     
@@ -192,13 +496,20 @@ def process_pdfs_batch(input_dir, output_dir, max_workers=4):
     output_path.mkdir(exist_ok=True)
     
     # Find all PDF files
-    pdf_files = list(input_path.glob("*.pdf"))
+    pdf_entries = _scan_pdf_entries(input_path)
     
-    if not pdf_files:
+    if not pdf_entries:
         logging.error(f"No PDF files found in {input_dir}")
         return
     
-    logging.info(f"Found {len(pdf_files)} PDF files to process")
+    logging.info(f"Found {len(pdf_entries)} PDF files to process")
+    
+    # Largest files first: a big PDF picked up last would otherwise keep
+    # the batch running on one worker while the others sit idle. The sizes
+    # come from the DirEntry objects of the directory scan, which cache
+    # their stat() (and take it from the listing itself on Windows).
+    pdf_entries.sort(key=lambda entry: entry.stat().st_size, reverse=True)
+    pdf_files = [Path(entry.path) for entry in pdf_entries]
     
     # Create batch summary
     batch_summary = {
@@ -209,67 +520,130 @@ def process_pdfs_batch(input_dir, output_dir, max_workers=4):
         "processed_files": 0,
         "successful_files": 0,
         "failed_files": 0,
+        "skipped_files": 0,
         "total_tables_found": 0,
-        "total_processing_time": 0,
-        "file_results": []
+        "total_processing_time": 0
+        # file_results is copied from batch_summary.ndjson when the summary is written
     }
     
     start_time = time.time()
     
-    # Process files in parallel
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
+    # Files whose summary.json exists were completed by an earlier run and
+    # are not processed again (unless forced); their saved summaries still
+    # count towards this batch's results
+    pending_files = []
+    skipped_results = []
+    for pdf_file in pdf_files:
+        summary_file = output_path / pdf_file.stem / "summary.json"
+        if not force and summary_file.is_file():
+            try:
+                skipped_results.append(read_json(summary_file))
+                continue
+            except Exception as e:
+                logging.warning(f"Unreadable {summary_file}, processing {pdf_file.name} again: {e}")
+        pending_files.append(pdf_file)
+    
+    if skipped_results:
+        logging.info(f"Skipping {len(skipped_results)} already processed files (use --force to redo them)")
+    
+    # Each file's result is appended to an NDJSON log as soon as it has been
+    # written, so only the counters stay in memory during the batch and the
+    # results logged so far survive a crash. The log is started afresh on
+    # every run: that is safe because a file finished by an earlier run has
+    # its summary.json and is logged again (as skipped) below, while
+    # appending would list it once per run.
+    results_log_file = output_path / "batch_summary.ndjson"
+    results_log = open(results_log_file, 'wb')
+    
+    # Process files in parallel. Camelot and pdfplumber are pure-Python
+    # parsers that hold the GIL, so each file is extracted in its own worker
+    # process; spawn gives every worker a fresh interpreter on all platforms.
+    # The CSV/JSON writes are I/O-bound and go to a small thread pool,
+    # overlapping with the extraction of the next files.
+    max_workers = max(1, min(max_workers, os.cpu_count() or 1, len(pending_files)))
+    with results_log, \
+            ProcessPoolExecutor(max_workers=max_workers,
+                                mp_context=multiprocessing.get_context("spawn")) as executor, \
+            ThreadPoolExecutor(max_workers=2) as writer:
+        # processed_files counts every file with a result in this batch,
+        # skipped ones included, so it always ends up equal to total_files
+        for result in skipped_results:
+            results_log.write(json_line(result))
+            batch_summary["processed_files"] += 1
+            batch_summary["skipped_files"] += 1
+            batch_summary["successful_files"] += 1
+            batch_summary["total_tables_found"] += result.get("total_tables", 0)
+        results_log.flush()
+        
+        # Submit all tasks; plain string paths are cheap to pickle
         future_to_pdf = {
-            executor.submit(process_single_pdf, pdf_file, output_path): pdf_file 
-            for pdf_file in pdf_files
+            executor.submit(extract_single_pdf, str(pdf_file), str(output_path)): pdf_file 
+            for pdf_file in pending_files
         }
         
-        # Process completed tasks
-        for future in as_completed(future_to_pdf):
-            pdf_file = future_to_pdf[future]
-            try:
-                result = future.result()
-                batch_summary["file_results"].append(result)
-                batch_summary["processed_files"] += 1
+        # Wait on extractions and writes together: each extracted PDF goes to
+        # the writers as soon as it is ready, and each written one is logged
+        # as soon as its write finishes. Futures are dropped once handled so
+        # a file's tables and text are freed after they are written, rather
+        # than kept until the whole batch is done.
+        persist_to_pdf = {}
+        pending = set(future_to_pdf)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in future_to_pdf:
+                    pdf_file = future_to_pdf.pop(future)
+                    try:
+                        persist_future = writer.submit(persist_results, future.result(), output_path)
+                    except Exception as e:
+                        persist_future = writer.submit(save_error, pdf_file, output_path, e)
+                    persist_to_pdf[persist_future] = pdf_file
+                    pending.add(persist_future)
+                    continue
                 
-                if result.get("status") == "success":
-                    batch_summary["successful_files"] += 1
-                    batch_summary["total_tables_found"] += result.get("total_tables", 0)
-                else:
-                    batch_summary["failed_files"] += 1
+                pdf_file = persist_to_pdf.pop(future)
+                try:
+                    result = future.result()
+                    results_log.write(json_line(result))
+                    results_log.flush()
+                    batch_summary["processed_files"] += 1
                     
-            except Exception as e:
-                logging.error(f"Error processing {pdf_file.name}: {e}")
-                batch_summary["failed_files"] += 1
-                batch_summary["file_results"].append({
-                    "filename": pdf_file.name,
-                    "status": "error",
-                    "error": str(e)
-                })
+                    if result.get("status") == "success":
+                        batch_summary["successful_files"] += 1
+                        batch_summary["total_tables_found"] += result.get("total_tables", 0)
+                    else:
+                        batch_summary["failed_files"] += 1
+                        
+                except Exception as e:
+                    logging.error(f"Error processing {pdf_file.name}: {e}")
+                    batch_summary["processed_files"] += 1
+                    batch_summary["failed_files"] += 1
+                    results_log.write(json_line({
+                        "filename": pdf_file.name,
+                        "status": "error",
+                        "error": str(e)
+                    }))
+                    results_log.flush()
     
     # Finalize batch summary
     batch_summary["total_processing_time"] = time.time() - start_time
     batch_summary["batch_end_time"] = datetime.now().isoformat()
     
-    # Save batch summary
+    # Save batch summary and CSV summary, streaming the per-file results
+    # from the log instead of loading them all back into memory
     batch_summary_file = output_path / "batch_summary.json"
-    with open(batch_summary_file, 'w') as f:
-        json.dump(batch_summary, f, indent=2)
-    
-    # Create CSV summary
-    successful_results = [r for r in batch_summary["file_results"] if r.get("status") == "success"]
-    if successful_results:
-        df = pd.DataFrame(successful_results)
-        csv_summary_file = output_path / "batch_summary.csv"
-        df.to_csv(csv_summary_file, index=False)
+    write_batch_summary(batch_summary_file, batch_summary, results_log_file)
+    write_summary_csv(output_path / "batch_summary.csv", results_log_file)
     
     # Print final summary
     logging.info("=" * 60)
     logging.info("BATCH PROCESSING COMPLETED")
     logging.info("=" * 60)
     logging.info(f"Total files: {batch_summary['total_files']}")
+    logging.info(f"Processed (including skipped): {batch_summary['processed_files']}")
     logging.info(f"Successful: {batch_summary['successful_files']}")
     logging.info(f"Failed: {batch_summary['failed_files']}")
+    logging.info(f"Skipped (already processed): {batch_summary['skipped_files']}")
     logging.info(f"Total tables found: {batch_summary['total_tables_found']}")
     logging.info(f"Total processing time: {batch_summary['total_processing_time']:.2f} seconds")
     logging.info(f"Results saved to: {output_path}")
@@ -281,6 +655,7 @@ def main():
     parser.add_argument("output_dir", help="Directory to save results")
     parser.add_argument("--workers", type=int, default=4, help="Number of parallel workers (default: 4)")
     parser.add_argument("--test", action="store_true", help="Test mode - process only first 3 files")
+    parser.add_argument("--force", action="store_true", help="Reprocess PDFs that already have a summary.json in the output directory")
     
     args = parser.parse_args()
     
@@ -299,14 +674,14 @@ def main():
     if args.test:
         logging.info("Running in TEST MODE - will process only first 3 files")
         # Limit to first 3 files for testing
-        pdf_files = list(Path(args.input_dir).glob("*.pdf"))[:3]
+        pdf_files = find_pdf_files(args.input_dir)[:3]
         if pdf_files:
             for pdf_file in pdf_files:
                 process_single_pdf(pdf_file, Path(args.output_dir))
         else:
             logging.error("No PDF files found for testing")
     else:
-        process_pdfs_batch(args.input_dir, args.output_dir, args.workers)
+        process_pdfs_batch(args.input_dir, args.output_dir, args.workers, args.force)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -14,7 +14,7 @@ import queue
 import time
 
 # Import the batch processing functions
-from batch_pdf_processor import process_single_pdf, process_pdfs_batch
+from batch_pdf_processor import find_pdf_files, process_single_pdf, process_pdfs_batch
 
 class BatchProcessorGUI:
     def __init__(self, root):
@@ -27,11 +27,15 @@ class BatchProcessorGUI:
         self.output_dir = tk.StringVar()
         self.workers = tk.IntVar(value=4)
         self.test_mode = tk.BooleanVar(value=False)
+        self.force = tk.BooleanVar(value=False)
         
         # Message queue for logging
         self.log_queue = queue.Queue()
         
         self.setup_ui()
+        
+        # The log is redrawn when a message is posted rather than on a timer
+        self.root.bind("<<LogUpdate>>", lambda event: self.drain_log())
         self.update_log()
     
     def setup_ui(self):
@@ -69,6 +73,10 @@ class BatchProcessorGUI:
         ttk.Checkbutton(options_frame, text="Test mode (process only first 3 files)", 
                        variable=self.test_mode).grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
         
+        # Force reprocessing
+        ttk.Checkbutton(options_frame, text="Reprocess files that already have results", 
+                       variable=self.force).grid(row=2, column=0, columnspan=2, sticky="w", pady=5)
+        
         # Process button
         self.process_button = ttk.Button(main_frame, text="Start Processing", command=self.start_processing)
         self.process_button.grid(row=3, column=0, columnspan=3, pady=10)
@@ -98,11 +106,12 @@ class BatchProcessorGUI:
             self.output_dir.set(directory)
     
     def log_message(self, message):
-        """Add message to log queue"""
+        """Add message to log queue and wake the UI thread to show it"""
         self.log_queue.put(message)
+        self.root.event_generate("<<LogUpdate>>", when="tail")
     
-    def update_log(self):
-        """Update log display from queue"""
+    def drain_log(self):
+        """Move all queued messages into the log display"""
         try:
             while True:
                 message = self.log_queue.get_nowait()
@@ -110,8 +119,11 @@ class BatchProcessorGUI:
                 self.log_text.see(tk.END)
         except queue.Empty:
             pass
-        finally:
-            self.root.after(100, self.update_log)
+    
+    def update_log(self):
+        """Fallback drain, in case a <<LogUpdate>> event was missed"""
+        self.drain_log()
+        self.root.after(1000, self.update_log)
     
     def start_processing(self):
         """Start batch processing in a separate thread"""
@@ -144,6 +156,7 @@ class BatchProcessorGUI:
             output_dir = self.output_dir.get()
             workers = self.workers.get()
             test_mode = self.test_mode.get()
+            force = self.force.get()
             
             self.log_message(f"Starting batch processing...")
             self.log_message(f"Input directory: {input_dir}")
@@ -153,7 +166,7 @@ class BatchProcessorGUI:
             if test_mode:
                 self.log_message("Running in TEST MODE - will process only first 3 files")
                 # Process only first 3 files for testing
-                pdf_files = list(Path(input_dir).glob("*.pdf"))[:3]
+                pdf_files = find_pdf_files(input_dir)[:3]
                 if pdf_files:
                     for pdf_file in pdf_files:
                         self.log_message(f"Processing: {pdf_file.name}")
@@ -166,7 +179,7 @@ class BatchProcessorGUI:
                     self.log_message("No PDF files found for testing")
             else:
                 # Full batch processing
-                process_pdfs_batch(input_dir, output_dir, workers)
+                process_pdfs_batch(input_dir, output_dir, workers, force)
             
             self.log_message("Batch processing completed!")
             
@@ -1,21 +1,22 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import os
+import functools
 import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-import base64
 
-# Page configuration
-st.set_page_config(
-    page_title="Advanced PDF Extractor",
-    page_icon="📄",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+from alternative_pdf_extractor_no_java import has_table_rulings
 
-# Custom CSS for better styling
-st.markdown("""
+# orjson is optional; it serializes the summary faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -44,32 +45,100 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Page configuration
+st.set_page_config(
+    page_title="Advanced PDF Extractor",
+    page_icon="📄",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Custom CSS for better styling
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Heavy PDF libraries are imported on first use; a missing one raises ImportError at the call site
+@functools.cache
+def _camelot():
+    import camelot.io as camelot
+    return camelot
+
+@functools.cache
+def _pdfplumber():
+    import pdfplumber
+    return pdfplumber
+
+@functools.cache
+def _pypdfium2():
+    import pypdfium2 as pdfium
+    return pdfium
+
+def page_ranges(pages):
+    """Format ascending page numbers as a Camelot pages string, e.g. "3,5,7-9"."""
+    ranges = []
+    for page in pages:
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def ruled_pages(pdf_path):
+    """Return (page count, pages that draw enough lines for a bordered table), or None if pdfplumber can't read the PDF."""
+    try:
+        pages = []
+        with _pdfplumber().open(pdf_path) as pdf:
+            for page_num, page in enumerate(pdf.pages, 1):
+                # Same test as the command-line extractor, so both gate Lattice alike
+                if has_table_rulings(page):
+                    pages.append(page_num)
+                page.close()
+            return len(pdf.pages), pages
+    except Exception:
+        return None
 
 def extract_with_camelot(pdf_path):
     """Extract tables using Camelot."""
     try:
-        import camelot.io as camelot
+        camelot = _camelot()
         st.write("Trying Camelot...")
         
         # Try different table detection methods
         tables = []
         
-        # Method 1: Lattice (for tables with borders)
+        # Method 1: Lattice (for tables with borders), only on pages with ruling lines
+        layout = ruled_pages(pdf_path)
+        lattice_pages = page_ranges(layout[1]) if layout else 'all'
         try:
-            with st.spinner("Camelot Lattice method..."):
-                lattice_tables = camelot.read_pdf(pdf_path, pages='all', flavor='lattice')
-                tables.extend(lattice_tables)
-                st.write(f"  Lattice method found {len(lattice_tables)} tables")
+            if lattice_pages:
+                with st.spinner("Camelot Lattice method..."):
+                    lattice_tables = camelot.read_pdf(pdf_path, pages=lattice_pages, flavor='lattice')
+                    tables.extend(lattice_tables)
+                    st.write(f"  Lattice method found {len(lattice_tables)} tables")
+            else:
+                st.write("  Lattice method skipped: no page has ruling lines")
         except Exception as e:
             st.write(f"  Lattice method failed: {e}")
         
-        # Method 2: Stream (for tables without borders)
+        # Method 2: Stream (for tables without borders), only on pages Lattice found nothing on
         try:
-            with st.spinner("Camelot Stream method..."):
-                stream_tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
-                tables.extend(stream_tables)
-                st.write(f"  Stream method found {len(stream_tables)} tables")
+            stream_pages = 'all'
+            if tables:
+                covered = {int(table.page) for table in tables}
+                if layout:
+                    n_pages = layout[0]
+                else:
+                    from PyPDF2 import PdfReader
+                    n_pages = len(PdfReader(pdf_path).pages)
+                stream_pages = page_ranges(p for p in range(1, n_pages + 1) if p not in covered)
+            if stream_pages:
+                with st.spinner("Camelot Stream method..."):
+                    stream_tables = camelot.read_pdf(pdf_path, pages=stream_pages, flavor='stream')
+                    tables.extend(stream_tables)
+                    st.write(f"  Stream method found {len(stream_tables)} tables")
+            else:
+                st.write("  Stream method skipped: Lattice found tables on every page")
         except Exception as e:
             st.write(f"  Stream method failed: {e}")
         
@@ -90,7 +159,7 @@ def extract_with_camelot(pdf_path):
 def extract_with_pdfplumber(pdf_path):
     """Extract tables and text using pdfplumber."""
     try:
-        import pdfplumber
+        pdfplumber = _pdfplumber()
         st.write("Trying pdfplumber...")
         
         tables = []
@@ -102,7 +171,7 @@ def extract_with_pdfplumber(pdf_path):
                 page_tables = page.extract_tables()
                 if page_tables:
                     for table_num, table in enumerate(page_tables):
-                        if table and any(any(cell for cell in row) for row in table):
+                        if any(map(any, table)):
                             tables.append({
                                 'page': page_num + 1,
                                 'table_num': table_num + 1,
@@ -124,25 +193,75 @@ def extract_with_pdfplumber(pdf_path):
         st.write(f"pdfplumber error: {e}")
         return [], ""
 
-def extract_text_with_pdfplumber(pdf_path):
-    """Extract text using pdfplumber"""
+def extract_text_fast(pdf_bytes):
+    """Extract plain text with pdfium, skipping pdfplumber's layout analysis; None if pypdfium2 can't be used."""
     try:
-        import pdfplumber
-        with st.spinner("Extracting text..."):
-            text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            return text.strip()
+        pdf = _pypdfium2().PdfDocument(pdf_bytes)
     except ImportError:
-        st.warning("⚠️ pdfplumber not available for text extraction")
-        return ""
+        return None
     except Exception as e:
-        st.error(f"❌ Text extraction error: {str(e)}")
-        return ""
+        st.write(f"pypdfium2 error: {e}")
+        return None
+    try:
+        all_text = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            text = textpage.get_text_range().replace("\r\n", "\n")
+            textpage.close()
+            page.close()
+            if text:
+                all_text.append(text)
+        return '\n'.join(all_text)
+    finally:
+        pdf.close()
+
+def compact_table(df):
+    """Store repetitive text columns as categories; cell text is kept exactly as extracted."""
+    for column in df.columns[df.dtypes == object]:
+        if df[column].nunique(dropna=False) < 0.5 * len(df):
+            df[column] = df[column].astype('category')
+    return df
+
+@contextmanager
+def temp_pdf(pdf_bytes):
+    """Write PDF bytes to a temporary file for the path-based extractors."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+        tmp_file.write(pdf_bytes)
+    try:
+        yield tmp_file.name
+    finally:
+        os.unlink(tmp_file.name)
+
+# Cached on the PDF content, so widget reruns and app restarts skip re-extraction
+@st.cache_data(max_entries=16, show_spinner=False, persist="disk")
+def cached_camelot(pdf_bytes):
+    """Camelot tables for a PDF, as DataFrames so the results can be pickled."""
+    with temp_pdf(pdf_bytes) as pdf_path:
+        return [compact_table(table.df) for table in extract_with_camelot(pdf_path)]
+
+@st.cache_data(max_entries=16, show_spinner=False, persist="disk")
+def cached_pdfplumber(pdf_bytes):
+    """pdfplumber tables and text for a PDF."""
+    with temp_pdf(pdf_bytes) as pdf_path:
+        return extract_with_pdfplumber(pdf_path)
 
+@st.cache_data(max_entries=16, show_spinner=False, persist="disk")
+def cached_text_fast(pdf_bytes):
+    """pypdfium2 text for a PDF, or None when pdfplumber has to be used."""
+    return extract_text_fast(pdf_bytes)
+
+def table_to_markdown(df):
+    """Render a DataFrame as a markdown table without going through tabulate."""
+    headers = [str(h) for h in df.columns]
+    # Blank out missing values once for the whole frame
+    cells = df.astype(object).where(df.notna(), "").astype(str)
+    
+    header = "| " + " | ".join(headers) + " |"
+    separator = "| " + " | ".join(["---"] * len(headers)) + " |"
+    rows = ["| " + " | ".join(row) + " |" for row in cells.itertuples(index=False, name=None)]
+    return "\n".join([header, separator, *rows])
+
+@st.cache_data(max_entries=16, show_spinner=False)
 def convert_to_markdown(text, tables):
     """Convert extracted content to markdown format"""
     markdown_parts = []
@@ -154,18 +273,15 @@ def convert_to_markdown(text, tables):
     if text:
         markdown_parts.append("## Text Content\n")
         # Clean up text and format
-        lines = text.split('\n')
-        formatted_lines = []
-        for line in lines:
-            line = line.strip()
-            if line:
-                # Simple formatting heuristics
-                if line.isupper() and len(line) > 3:
-                    formatted_lines.append(f"### {line}")
-                elif line.endswith(':') and len(line) < 50:
-                    formatted_lines.append(f"**{line}**")
-                else:
-                    formatted_lines.append(line)
+        lines = pd.Series(text.split('\n')).str.strip()
+        lines = lines[lines.astype(bool)]
+        length = lines.str.len()
+        # Simple formatting heuristics
+        formatted_lines = np.select(
+            [lines.str.isupper() & (length > 3), lines.str.endswith(':') & (length < 50)],
+            ["### " + lines, "**" + lines + "**"],
+            default=lines,
+        )
         
         markdown_parts.append('\n'.join(formatted_lines))
         markdown_parts.append("\n---\n")
@@ -184,46 +300,21 @@ def convert_to_markdown(text, tables):
             
             # Create markdown table
             if not df.empty:
-                # Get headers
-                headers = df.columns.tolist()
-                markdown_parts.append("| " + " | ".join(str(h) for h in headers) + " |")
-                markdown_parts.append("| " + " | ".join(["---"] * len(headers)) + " |")
-                
-                # Add rows
-                for _, row in df.iterrows():
-                    row_values = [str(val) if pd.notna(val) else "" for val in row.values]
-                    markdown_parts.append("| " + " | ".join(row_values) + " |")
-                
+                markdown_parts.append(table_to_markdown(df))
                 markdown_parts.append("")
     
     return '\n'.join(markdown_parts)
 
-def get_download_link(data, filename, file_type):
-    """Generate download link for files"""
-    try:
-        if file_type == "csv":
-            if isinstance(data, pd.DataFrame):
-                csv = data.to_csv(index=False)
-                b64 = base64.b64encode(csv.encode()).decode()
-                href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">📥 Download CSV</a>'
-            else:
-                return "❌ Invalid data format for CSV"
-        elif file_type == "json":
-            json_str = json.dumps(data, indent=2, ensure_ascii=False)
-            b64 = base64.b64encode(json_str.encode()).decode()
-            href = f'<a href="data:file/json;base64,{b64}" download="{filename}.json">📥 Download JSON</a>'
-        elif file_type == "txt":
-            b64 = base64.b64encode(data.encode()).decode()
-            href = f'<a href="data:file/txt;base64,{b64}" download="{filename}.txt">�� Download TXT</a>'
-        elif file_type == "md":
-            b64 = base64.b64encode(data.encode()).decode()
-            href = f'<a href="data:file/md;base64,{b64}" download="{filename}.md">📥 Download Markdown</a>'
-        else:
-            return "❌ Unsupported file type"
-        
-        return href
-    except Exception as e:
-        return f"❌ Download error: {str(e)}"
+def dump_json(data):
+    """Serialize data as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def table_csv(df):
+    """CSV bytes for a table download, serialized once per table."""
+    return df.to_csv(index=False).encode()
 
 def main():
     # Header
@@ -247,111 +338,108 @@ def main():
     
     # Main content
     if uploaded_file is not None:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_file_path = tmp_file.name
+        pdf_bytes = uploaded_file.getvalue()
         
-        try:
-            # File info
-            file_size = len(uploaded_file.getvalue()) / 1024  # KB
-            st.info(f"📁 **File:** {uploaded_file.name} ({file_size:.1f} KB)")
-            
-            # Extraction process
-            st.markdown("## 🔍 Extraction Results")
+        # File info
+        file_size = uploaded_file.size / 1024  # KB
+        st.info(f"📁 **File:** {uploaded_file.name} ({file_size:.1f} KB)")
+        
+        # Extraction process
+        st.markdown("## 🔍 Extraction Results")
+        
+        extracted_tables = []
+        extracted_text = ""
+        method_used = ""
+        
+        # Try Camelot first
+        if use_camelot:
+            st.markdown("### 🐪 Camelot Extraction")
+            camelot_tables = cached_camelot(pdf_bytes)
+            if camelot_tables:
+                extracted_tables = camelot_tables
+                method_used = "camelot"
+        
+        # Camelot already has the tables, so only plain text is needed
+        fast_text = cached_text_fast(pdf_bytes) if method_used else None
+        if fast_text is not None:
+            extracted_text = fast_text
+        # One pdfplumber pass gives the fallback tables and, without pypdfium2, the text
+        elif method_used or use_pdfplumber:
+            st.markdown("### 📄 pdfplumber Extraction")
+            pdfplumber_tables, extracted_text = cached_pdfplumber(pdf_bytes)
+            if not extracted_tables:
+                extracted_tables = pdfplumber_tables
+                method_used = "pdfplumber"
+        
+        # Display results
+        if extracted_tables or extracted_text:
+            st.markdown("## 📊 Results")
             
-            extracted_tables = []
-            extracted_text = ""
-            method_used = ""
+            # Summary
+            summary = {
+                "filename": uploaded_file.name,
+                "method": method_used,
+                "tables_found": len(extracted_tables) if extracted_tables else 0,
+                "text_length": len(extracted_text) if extracted_text else 0,
+                "word_count": len(extracted_text.split()) if extracted_text else 0,
+                "file_size_kb": file_size
+            }
             
-            # Try Camelot first
-            if use_camelot:
-                st.markdown("### 🐪 Camelot Extraction")
-                camelot_tables = extract_with_camelot(tmp_file_path)
-                if camelot_tables:
-                    extracted_tables = camelot_tables
-                    method_used = "camelot"
-                    extracted_text = extract_text_with_pdfplumber(tmp_file_path)
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Tables Found", summary["tables_found"])
+            with col2:
+                st.metric("Words Extracted", summary["word_count"])
+            with col3:
+                st.metric("Characters", summary["text_length"])
+            with col4:
+                st.metric("Method Used", summary["method"].title())
             
-            # Try pdfplumber
-            if not extracted_tables and use_pdfplumber:
-                st.markdown("### 📄 pdfplumber Extraction")
-                pdfplumber_tables, pdfplumber_text = extract_with_pdfplumber(tmp_file_path)
-                extracted_tables = pdfplumber_tables
-                method_used = "pdfplumber"
-                extracted_text = pdfplumber_text
+            # Display tables
+            if extracted_tables:
+                st.markdown("### 📋 Extracted Tables")
+                for i, table in enumerate(extracted_tables):
+                    st.markdown(f"**Table {i+1}:**")
+                    if hasattr(table, 'df'):  # Camelot table
+                        table = table.df
+                    if isinstance(table, pd.DataFrame):  # Tabula/pdfplumber table
+                        st.dataframe(table)
+                        st.download_button("📥 Download CSV", table_csv(table), file_name=f"table_{i+1}.csv",
+                                           mime="text/csv", key=f"download_table_{i+1}")
+                    st.markdown("---")
             
-            # Display results
-            if extracted_tables or extracted_text:
-                st.markdown("## 📊 Results")
-                
-                # Summary
-                summary = {
-                    "filename": uploaded_file.name,
-                    "method": method_used,
-                    "tables_found": len(extracted_tables) if extracted_tables else 0,
-                    "text_length": len(extracted_text) if extracted_text else 0,
-                    "word_count": len(extracted_text.split()) if extracted_text else 0,
-                    "file_size_kb": file_size
-                }
-                
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Tables Found", summary["tables_found"])
-                with col2:
-                    st.metric("Words Extracted", summary["word_count"])
-                with col3:
-                    st.metric("Characters", summary["text_length"])
-                with col4:
-                    st.metric("Method Used", summary["method"].title())
-                
-                # Display tables
-                if extracted_tables:
-                    st.markdown("### 📋 Extracted Tables")
-                    for i, table in enumerate(extracted_tables):
-                        st.markdown(f"**Table {i+1}:**")
-                        if hasattr(table, 'df'):  # Camelot table
-                            st.dataframe(table.df)
-                            st.markdown(get_download_link(table.df, f"table_{i+1}", "csv"), unsafe_allow_html=True)
-                        elif isinstance(table, pd.DataFrame):  # Tabula/pdfplumber table
-                            st.dataframe(table)
-                            st.markdown(get_download_link(table, f"table_{i+1}", "csv"), unsafe_allow_html=True)
-                        st.markdown("---")
-                
-                # Display text
-                if extracted_text:
-                    st.markdown("### 📝 Extracted Text")
-                    
-                    # Text preview
-                    preview_length = 1000
-                    if len(extracted_text) > preview_length:
-                        st.text_area("Text Preview (first 1000 characters):", 
-                                   extracted_text[:preview_length] + "...", 
-                                   height=200)
-                        st.markdown(f"*Full text has {len(extracted_text)} characters*")
-                    else:
-                        st.text_area("Extracted Text:", extracted_text, height=300)
-                    
-                    # Download text
-                    st.markdown(get_download_link(extracted_text, "extracted_text", "txt"), unsafe_allow_html=True)
+            # Display text
+            if extracted_text:
+                st.markdown("### 📝 Extracted Text")
                 
-                # Generate and display markdown
-                if extracted_text or extracted_tables:
-                    st.markdown("### 📄 Markdown Export")
-                    markdown_content = convert_to_markdown(extracted_text, extracted_tables)
-                    st.text_area("Generated Markdown:", markdown_content, height=400)
-                    st.markdown(get_download_link(markdown_content, "extracted_content", "md"), unsafe_allow_html=True)
-                
-                # Download summary
-                st.markdown("### 📥 Download Summary")
-                st.markdown(get_download_link(summary, "extraction_summary", "json"), unsafe_allow_html=True)
+                # Text preview
+                preview_length = 1000
+                if len(extracted_text) > preview_length:
+                    st.text_area("Text Preview (first 1000 characters):", 
+                               extracted_text[:preview_length] + "...", 
+                               height=200)
+                    st.markdown(f"*Full text has {len(extracted_text)} characters*")
+                else:
+                    st.text_area("Extracted Text:", extracted_text, height=300)
                 
-            else:
-                st.error("❌ No content could be extracted from the PDF. Try a different file or check if the PDF contains extractable text.")
-        
-        finally:
-            # Clean up temporary file
-            os.unlink(tmp_file_path)
+                # Download text
+                st.download_button("📥 Download TXT", extracted_text, file_name="extracted_text.txt", mime="text/plain")
+            
+            # Generate and display markdown
+            if extracted_text or extracted_tables:
+                st.markdown("### 📄 Markdown Export")
+                markdown_content = convert_to_markdown(extracted_text, extracted_tables)
+                st.text_area("Generated Markdown:", markdown_content, height=400)
+                st.download_button("📥 Download Markdown", markdown_content, file_name="extracted_content.md",
+                                   mime="text/markdown")
+            
+            # Download summary
+            st.markdown("### 📥 Download Summary")
+            st.download_button("📥 Download JSON", dump_json(summary),
+                               file_name="extraction_summary.json", mime="application/json")
+            
+        else:
+            st.error("❌ No content could be extracted from the PDF. Try a different file or check if the PDF contains extractable text.")
     
     else:
         # Show instructions when no file is uploaded